@@ -1,14 +1,40 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from jose import JWTError, jwt
 import bcrypt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
+from config import (
+    SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES, BCRYPT_MAX_WORKERS,
+    BCRYPT_MAX_PENDING, BCRYPT_ROUNDS, TOKEN_CACHE_SIZE, JWT_FAST_PATH
+)
 from models import TokenData
+from metrics import bcrypt_duration, timed
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
+# bcrypt releases the GIL, so a small thread pool keeps hashing off the event loop
+_hash_executor = ThreadPoolExecutor(max_workers=BCRYPT_MAX_WORKERS, thread_name_prefix="bcrypt")
+
+# Hashes running or queued in the executor; only touched from the event loop
+_hash_pending = 0
+
+# sha256(token) -> (user_id, exp) for tokens that already passed verification
+_token_cache: "OrderedDict[bytes, Tuple[str, float]]" = OrderedDict()
+
+_HMAC_DIGESTS = {"HS256": hashlib.sha256, "HS384": hashlib.sha384, "HS512": hashlib.sha512}
+
+# Claims the hmac path understands; anything else goes through python-jose
+_FAST_PATH_CLAIMS = {"sub", "exp", "iat", "nbf"}
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash."""
     return bcrypt.checkpw(
@@ -18,10 +44,46 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 def get_password_hash(password: str) -> str:
     """Hash a password."""
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
     return hashed.decode('utf-8')
 
+def needs_rehash(hashed_password: str) -> bool:
+    """True when a hash was made with a work factor other than BCRYPT_ROUNDS."""
+    try:
+        return int(hashed_password.split("$")[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return False
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password in the bcrypt executor without blocking the event loop."""
+    with timed(bcrypt_duration, "bcrypt", "verify"):
+        return await _run_hash(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password in the bcrypt executor without blocking the event loop."""
+    with timed(bcrypt_duration, "bcrypt", "hash"):
+        return await _run_hash(get_password_hash, password)
+
+async def _run_hash(fn, *args):
+    """Run a bcrypt call in the executor, or fail fast with 429 when it is saturated."""
+    global _hash_pending
+    if _hash_pending >= BCRYPT_MAX_PENDING:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Server busy, try again shortly",
+            headers={"Retry-After": "1"}
+        )
+    _hash_pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_hash_executor, fn, *args)
+    finally:
+        _hash_pending -= 1
+
+def shutdown_hash_executor():
+    """Stop the bcrypt worker threads."""
+    _hash_executor.shutdown(wait=False, cancel_futures=True)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token."""
     to_encode = data.copy()
@@ -34,16 +96,74 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 def decode_token(token: str) -> Optional[str]:
-    """Decode and validate a JWT token."""
+    """Decode and validate a JWT token.
+
+    Verified tokens are kept in a bounded LRU keyed by their digest until
+    they expire, so repeat requests skip signature checks entirely.
+    """
+    key = hashlib.sha256(token.encode("utf-8")).digest()
+    cached = _token_cache.get(key)
+    if cached is not None:
+        user_id, exp = cached
+        if exp > time.time():
+            _token_cache.move_to_end(key)
+            return user_id
+        del _token_cache[key]
+
+    payload = _decode_fast(token) if JWT_FAST_PATH and ALGORITHM in _HMAC_DIGESTS else None
+    if payload is None:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except JWTError:
+            return None
+
+    user_id: str = payload.get("sub")
+    if user_id is None:
+        return None
+
+    # Tokens without exp are verified each time rather than cached forever
+    exp = payload.get("exp")
+    if isinstance(exp, (int, float)):
+        _token_cache[key] = (user_id, float(exp))
+        if len(_token_cache) > TOKEN_CACHE_SIZE:
+            _token_cache.popitem(last=False)
+    return user_id
+
+def _decode_fast(token: str) -> Optional[dict]:
+    """Verify an HS* token with hmac alone and return its claims.
+
+    Returns None when the token is invalid or uses features this path does
+    not handle; callers then fall back to python-jose, which gives the
+    authoritative answer.
+    """
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
+        header_b64, payload_b64, signature_b64 = token.split(".")
+        header = json.loads(_b64url_decode(header_b64))
+        if header.get("alg") != ALGORITHM or set(header) - {"alg", "typ"}:
             return None
-        return user_id
-    except JWTError:
+
+        signing_input = f"{header_b64}.{payload_b64}".encode("ascii")
+        expected = hmac.new(SECRET_KEY.encode("utf-8"), signing_input, _HMAC_DIGESTS[ALGORITHM]).digest()
+        if not hmac.compare_digest(expected, _b64url_decode(signature_b64)):
+            return None
+
+        payload = json.loads(_b64url_decode(payload_b64))
+        if not isinstance(payload, dict) or set(payload) - _FAST_PATH_CLAIMS:
+            return None
+        now = time.time()
+        exp = payload.get("exp")
+        if not isinstance(exp, (int, float)) or exp <= now:
+            return None
+        nbf = payload.get("nbf")
+        if nbf is not None and (not isinstance(nbf, (int, float)) or nbf > now):
+            return None
+        return payload
+    except (ValueError, TypeError, AttributeError):
         return None
 
+def _b64url_decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
 async def get_current_user(token: str = Depends(oauth2_scheme)) -> str:
     """Get the current user from the JWT token."""
     credentials_exception = HTTPException(
@@ -0,0 +1,217 @@
+"""Dashboard-shaped load test reporting per-endpoint latency as JSON.
+
+Seeds synthetic users and events (see benchmarks.seed), then runs
+--concurrency virtual users against the app. Each one logs in and then
+loops over a weighted mix of today, upcoming, month, create and update
+requests until --duration seconds have passed. By default requests go
+through httpx's ASGI transport straight into the FastAPI app in this
+process. Pass --url to load a running server instead.
+
+Point DATABASE_* at a disposable Postgres (for example a local
+`docker run -e POSTGRES_PASSWORD=postgres -p 5432:5432 postgres:16`).
+Seeded rows are removed afterwards unless --keep is given. Every virtual
+user logs in from the same address, so set RATE_LIMIT_ENABLED=false (or
+raise LOGIN_IP_BURST) when --concurrency exceeds the login burst.
+
+    python -m benchmarks.load_test --users 50 --concurrency 20 --duration 30 --output before.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import subprocess
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional
+from database import open_pool, close_pool, get_pool
+from migrations import migrate
+from benchmarks.seed import PASSWORD, add_arguments, cleanup, email_for, parse_distribution, seed
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+DEFAULT_MIX = "today=30,upcoming=30,month=25,create=10,update=5"
+
+class Recorder:
+    """Collects latencies (seconds) and failures per endpoint."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    async def request(self, client, name: str, method: str, url: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except Exception:
+            self.errors[name] += 1
+            return None
+        self.latencies[name].append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            self.errors[name] += 1
+            return None
+        return response
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+def summarize(recorder: Recorder, elapsed: float) -> dict:
+    endpoints = {}
+    for name in sorted(set(recorder.latencies) | set(recorder.errors)):
+        values = sorted(recorder.latencies.get(name, []))
+        endpoints[name] = {
+            "requests": len(values),
+            "errors": recorder.errors.get(name, 0),
+            "throughput_rps": round(len(values) / elapsed, 2),
+            "mean_ms": round(sum(values) / len(values) * 1000, 3) if values else 0.0,
+            "p50_ms": round(percentile(values, 50) * 1000, 3),
+            "p95_ms": round(percentile(values, 95) * 1000, 3),
+            "p99_ms": round(percentile(values, 99) * 1000, 3),
+            "max_ms": round(values[-1] * 1000, 3) if values else 0.0,
+        }
+    total = sum(e["requests"] for e in endpoints.values())
+    return {
+        "endpoints": endpoints,
+        "total": {
+            "requests": total,
+            "errors": sum(e["errors"] for e in endpoints.values()),
+            "throughput_rps": round(total / elapsed, 2),
+        },
+    }
+
+def parse_mix(spec: str) -> Dict[str, int]:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = int(weight)
+    return mix
+
+async def virtual_user(client, recorder: Recorder, email: str, mix: Dict[str, int],
+                       days: int, deadline: float, rng: random.Random) -> None:
+    response = await recorder.request(
+        client, "POST /auth/login", "POST", "/auth/login", json={"email": email, "password": PASSWORD}
+    )
+    if response is None:
+        return
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    names, weights = list(mix), list(mix.values())
+    created: List[str] = []
+    today = date.today()
+
+    while time.monotonic() < deadline:
+        action = rng.choices(names, weights)[0]
+        if action == "today":
+            await recorder.request(client, "GET /events/today", "GET", "/events/today", headers=headers)
+        elif action == "upcoming":
+            await recorder.request(client, "GET /events/upcoming", "GET", "/events/upcoming", headers=headers)
+        elif action == "month":
+            day = today + timedelta(days=rng.randint(-days, days))
+            await recorder.request(
+                client, "GET /events/month", "GET", f"/events/month/{day.year}/{day.month}", headers=headers
+            )
+        elif action == "create" or (action == "update" and not created):
+            day = today + timedelta(days=rng.randint(0, days))
+            response = await recorder.request(client, "POST /events", "POST", "/events", headers=headers, json={
+                "title": "Load test event",
+                "event_date": day.isoformat(),
+                "start_time": "09:00:00",
+                "end_time": "10:00:00",
+                "notify_before": 10,
+            })
+            if response is not None:
+                created.append(response.json()["id"])
+        elif action == "update":
+            await recorder.request(
+                client, "PUT /events", "PUT", f"/events/{rng.choice(created)}",
+                headers=headers, json={"title": f"Updated {rng.randint(0, 9999)}"}
+            )
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+async def _main(args: argparse.Namespace) -> dict:
+    if httpx is None:
+        raise RuntimeError("benchmarks.load_test requires the httpx package")
+
+    await open_pool()
+    try:
+        await migrate()
+        async with get_pool().connection() as conn:
+            await cleanup(conn, args.run_id)
+            user_ids, total_events = await seed(
+                conn, args.run_id, args.users, parse_distribution(args.events_per_user), args.days, args.seed
+            )
+
+        if args.url:
+            client = httpx.AsyncClient(base_url=args.url, timeout=60)
+        else:
+            from main import app
+            client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60)
+
+        recorder = Recorder()
+        rng = random.Random(args.seed)
+        mix = parse_mix(args.mix)
+        started_at = datetime.now(timezone.utc)
+        started = time.monotonic()
+        deadline = started + args.duration
+        async with client:
+            await asyncio.gather(*(
+                virtual_user(client, recorder, email_for(args.run_id, i % len(user_ids)), mix, args.days,
+                             deadline, random.Random(rng.random()))
+                for i in range(args.concurrency)
+            ))
+        elapsed = time.monotonic() - started
+
+        if not args.keep:
+            async with get_pool().connection() as conn:
+                await cleanup(conn, args.run_id)
+    finally:
+        await close_pool()
+
+    return {
+        "commit": _git_commit(),
+        "started_at": started_at.isoformat(),
+        "target": args.url or "asgi",
+        "config": {
+            "users": args.users,
+            "events_per_user": args.events_per_user,
+            "events_seeded": total_events,
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "mix": mix,
+            "seed": args.seed,
+        },
+        "elapsed_s": round(elapsed, 3),
+        **summarize(recorder, elapsed),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_arguments(parser)
+    parser.add_argument("--concurrency", type=int, default=20, help="Virtual users running at once")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to run the workload")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Weighted actions, e.g. today=30,month=25")
+    parser.add_argument("--url", help="Load a running server instead of the in-process app")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--keep", action="store_true", help="Keep seeded rows after the run")
+    args = parser.parse_args()
+
+    report = json.dumps(asyncio.run(_main(args)), indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report + "\n")
+    else:
+        print(report)
@@ -0,0 +1,126 @@
+"""Seed calendar_users/calendar_events with synthetic data for load tests.
+
+Run from the backend directory against a disposable database:
+
+    python -m benchmarks.seed --users 200 --events-per-user pareto:100 --run-id demo
+    python -m benchmarks.seed --cleanup --run-id demo
+
+Events-per-user distributions: N (fixed), uniform:MIN:MAX, pareto:MEAN
+(heavy tail: most users have few events, a few have many).
+"""
+import argparse
+import asyncio
+import random
+from datetime import date, time, timedelta
+from typing import Callable, List, Tuple
+from psycopg import AsyncConnection
+from auth import get_password_hash
+from database import open_pool, close_pool, get_pool
+from migrations import migrate
+
+PASSWORD = "benchmark-password"
+
+def email_for(run_id: str, index: int) -> str:
+    return f"bench-{run_id}-{index}@example.com"
+
+def parse_distribution(spec: str) -> Callable[[random.Random], int]:
+    """Return a sampler for an events-per-user spec."""
+    kind, _, args = spec.partition(":")
+    if not args:
+        count = int(kind)
+        return lambda rng: count
+    if kind == "uniform":
+        low, high = (int(a) for a in args.split(":"))
+        return lambda rng: rng.randint(low, high)
+    if kind == "pareto":
+        mean = float(args)
+        alpha = 1.5  # mean of a Pareto(alpha) with xm = 1 is alpha / (alpha - 1)
+        scale = mean * (alpha - 1) / alpha
+        return lambda rng: min(int(scale * rng.paretovariate(alpha)), int(mean * 100))
+    raise ValueError(f"Unknown distribution: {spec}")
+
+async def seed(
+    conn: AsyncConnection,
+    run_id: str,
+    users: int,
+    events_per_user: Callable[[random.Random], int],
+    days: int,
+    seed_value: int
+) -> Tuple[List[str], int]:
+    """Insert users and events with COPY; returns (user ids, event count).
+
+    Events are spread over +/- days around today so the today, upcoming and
+    month views all have data.
+    """
+    rng = random.Random(seed_value)
+    password_hash = get_password_hash(PASSWORD)
+    async with conn.cursor() as cursor:
+        async with cursor.copy("COPY calendar_users (email, password_hash) FROM STDIN") as copy:
+            for i in range(users):
+                await copy.write_row((email_for(run_id, i), password_hash))
+        await cursor.execute(
+            "SELECT id FROM calendar_users WHERE email LIKE %s ORDER BY email",
+            (f"bench-{run_id}-%",)
+        )
+        user_ids = [str(row["id"]) for row in await cursor.fetchall()]
+
+        total = 0
+        today = date.today()
+        async with cursor.copy(
+            """COPY calendar_events (user_id, title, description, event_date, start_time, end_time, notify_before)
+               FROM STDIN"""
+        ) as copy:
+            for user_id in user_ids:
+                for i in range(events_per_user(rng)):
+                    start = time(rng.randint(7, 19), rng.choice((0, 15, 30, 45)))
+                    end = time(min(start.hour + rng.randint(1, 2), 23), start.minute)
+                    await copy.write_row((
+                        user_id,
+                        f"Event {i}",
+                        "Seeded by benchmarks.seed" if rng.random() < 0.5 else None,
+                        today + timedelta(days=rng.randint(-days, days)),
+                        start,
+                        end,
+                        rng.choice((0, 5, 10, 30)),
+                    ))
+                    total += 1
+    await conn.commit()
+    return user_ids, total
+
+async def cleanup(conn: AsyncConnection, run_id: str) -> None:
+    """Delete every user and event seeded under run_id."""
+    async with conn.cursor() as cursor:
+        await cursor.execute(
+            """DELETE FROM calendar_events WHERE user_id IN
+               (SELECT id FROM calendar_users WHERE email LIKE %s)""",
+            (f"bench-{run_id}-%",)
+        )
+        await cursor.execute("DELETE FROM calendar_users WHERE email LIKE %s", (f"bench-{run_id}-%",))
+    await conn.commit()
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--run-id", default="local", help="Tag for seeded rows (emails bench-<run-id>-N)")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--events-per-user", default="pareto:100", help="N, uniform:MIN:MAX or pareto:MEAN")
+    parser.add_argument("--days", type=int, default=180, help="Spread events over +/- this many days")
+    parser.add_argument("--seed", type=int, default=1)
+
+async def _main(args: argparse.Namespace) -> None:
+    await open_pool()
+    try:
+        await migrate()
+        async with get_pool().connection() as conn:
+            await cleanup(conn, args.run_id)
+            if not args.cleanup:
+                user_ids, total = await seed(
+                    conn, args.run_id, args.users, parse_distribution(args.events_per_user), args.days, args.seed
+                )
+                print(f"Seeded {len(user_ids)} users and {total} events (run id {args.run_id})")
+    finally:
+        await close_pool()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_arguments(parser)
+    parser.add_argument("--cleanup", action="store_true", help="Only delete rows from an earlier run")
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,65 @@
+"""Throughput of event list serialization: response_model vs the lean path.
+
+Run from the backend directory:
+
+    python -m benchmarks.serialization_benchmark [sizes...]
+"""
+import json
+import sys
+import timeit
+import uuid
+from datetime import date, datetime, time, timedelta, timezone
+from typing import List
+from pydantic import TypeAdapter
+from models import EventResponse
+from routers.events import _format_event
+from serialization import FastJSONResponse, event_record, orjson
+
+def _rows(count: int) -> List[dict]:
+    user_id = uuid.uuid4()
+    now = datetime.now(timezone.utc)
+    return [
+        {
+            "id": uuid.uuid4(),
+            "user_id": user_id,
+            "title": f"Event {i}",
+            "description": "Synthetic benchmark event" if i % 3 else None,
+            "event_date": date(2026, 1, 1) + timedelta(days=i % 365),
+            "start_time": time(9 + i % 8, 0),
+            "end_time": time(10 + i % 8, 30),
+            "notify_before": 10,
+            "created_at": now,
+            "updated_at": now,
+            "recurrence": {"freq": "weekly", "interval": 1, "until": None, "count": None, "exdates": []}
+                          if i % 50 == 0 else None,
+        }
+        for i in range(count)
+    ]
+
+def main(sizes: List[int]):
+    adapter = TypeAdapter(List[EventResponse])
+
+    for size in sizes:
+        rows = _rows(size)
+
+        def response_model():
+            # What FastAPI does with response_model=List[EventResponse]
+            content = [_format_event(r).model_dump() for r in rows]
+            data = adapter.dump_python(adapter.validate_python(content), mode="json")
+            json.dumps(data, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+        def lean():
+            FastJSONResponse([event_record(r) for r in rows])
+
+        number = max(1, 20000 // size)
+        results = {
+            "response_model": min(timeit.repeat(response_model, number=number, repeat=5)) / number,
+            f"lean ({'orjson' if orjson else 'json'})": min(timeit.repeat(lean, number=number, repeat=5)) / number,
+        }
+        baseline = results["response_model"]
+        print(f"{size} events")
+        for name, seconds in results.items():
+            print(f"  {name:<16} {seconds * 1000:8.2f} ms  {size / seconds:10.0f} events/s  {baseline / seconds:5.1f}x")
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1000, 10000])
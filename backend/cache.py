@@ -0,0 +1,122 @@
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Optional, Tuple
+from serialization import dumps
+from config import CACHE_BACKEND, CACHE_TTL_SECONDS, CACHE_MAX_ENTRIES, REDIS_URL
+
+class CacheBackend:
+    """Minimal async key/value interface shared by the cache backends.
+
+    Mirrors the subset of Redis commands the event cache needs, so a Redis
+    client (or a fake with the same methods) can be dropped in.
+    """
+
+    async def get(self, key: str) -> Optional[str]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        raise NotImplementedError
+
+class MemoryCache(CacheBackend):
+    """In-process LRU cache with per-entry TTL and a bound on entry count.
+
+    Each uvicorn worker has its own copy. Event views are keyed by the user's
+    change version, so a write made through another worker is never served
+    stale; the workers just cache separately. The replica stickiness marker
+    is not versioned and needs the Redis backend with several workers.
+    """
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+class RedisCache(CacheBackend):
+    """Cache backed by a redis.asyncio-compatible client."""
+
+    def __init__(self, client: Any):
+        self.client = client
+
+    async def get(self, key: str) -> Optional[str]:
+        value = await self.client.get(key)
+        if isinstance(value, bytes):
+            return value.decode("utf-8")
+        return value
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        await self.client.set(key, value, px=int(ttl * 1000))
+
+class EventCache:
+    """Per-user cache of the today, upcoming and month event views.
+
+    Keys embed the user's change version, which every write to their events
+    bumps, so a write makes all their older entries unreachable in every
+    worker and nothing has to be invalidated. A body is always at least as
+    new as its version because the version is read first. Keys also embed
+    the date a view was computed for, so "today" is never served after midnight.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: float = CACHE_TTL_SECONDS):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, user_id: str, view: str, version: int) -> Optional[str]:
+        """Return a cached view as its encoded JSON body, or None on a miss."""
+        value = await self.backend.get(self._key(user_id, view, version))
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    async def set(self, user_id: str, view: str, version: int, events: list) -> None:
+        """Cache a view, computed at this change version, given as a list of event records."""
+        value = dumps(events).decode("utf-8")
+        await self.backend.set(self._key(user_id, view, version), value, self.ttl)
+
+    def stats(self) -> dict:
+        """Return hit/miss counters."""
+        return {"hits": self.hits, "misses": self.misses}
+
+    @staticmethod
+    def _key(user_id: str, view: str, version: int) -> str:
+        return f"events:{user_id}:{view}:v{version}"
+
+def today_view(day: date) -> str:
+    return f"today:{day.isoformat()}"
+
+def upcoming_view(day: date) -> str:
+    return f"upcoming:{day.isoformat()}"
+
+def month_view(year: int, month: int) -> str:
+    return f"month:{year:04d}-{month:02d}"
+
+def _make_backend() -> CacheBackend:
+    if CACHE_BACKEND == "redis":
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("CACHE_BACKEND=redis requires the redis package")
+        return RedisCache(redis.from_url(REDIS_URL))
+    return MemoryCache()
+
+event_cache = EventCache(_make_backend())
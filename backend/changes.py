@@ -0,0 +1,96 @@
+import asyncio
+import json
+from typing import Callable, Dict, Optional, Set
+import psycopg
+from database import get_conninfo
+from config import CHANGE_QUEUE_SIZE
+
+CHANNEL = "calendar_events"
+
+class ChangeHub:
+    """Fans calendar_events NOTIFY messages out to per-user subscriber queues.
+
+    One LISTEN connection per process serves every open stream, plus any
+    other channel registered with listen(). A subscriber that falls
+    CHANGE_QUEUE_SIZE changes behind gets a single "resync" message in place
+    of the backlog and should refetch.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._handlers: Dict[str, Callable[[str], None]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def channels(self) -> Set[str]:
+        return set(self._handlers)
+
+    def listen(self, channel: str, handler: Callable[[str], None]) -> None:
+        """Pass each payload on channel to handler; register before start()."""
+        self._handlers[channel] = handler
+
+    def subscribe(self, user_id: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=CHANGE_QUEUE_SIZE)
+        self._subscribers.setdefault(user_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, user_id: str, queue: asyncio.Queue) -> None:
+        queues = self._subscribers.get(user_id)
+        if queues:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[user_id]
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        delay = 1
+        while True:
+            try:
+                conn = await psycopg.AsyncConnection.connect(get_conninfo(), autocommit=True)
+                async with conn:
+                    for channel in self._handlers:
+                        await conn.execute(f"LISTEN {channel}")
+                    delay = 1
+                    # Anything missed while disconnected is unknown, so ask clients to refetch
+                    self._broadcast_resync()
+                    async for notify in conn.notifies():
+                        self._handlers[notify.channel](notify.payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Change stream listener error: {e}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30)
+
+    def dispatch(self, payload: str) -> None:
+        """Handler for CHANNEL: queue the change for the user's streams."""
+        change = json.loads(payload)
+        for queue in self._subscribers.get(change["user_id"], ()):
+            self._offer(queue, change)
+
+    def _broadcast_resync(self) -> None:
+        for queues in self._subscribers.values():
+            for queue in queues:
+                self._offer(queue, {"op": "resync"})
+
+    @staticmethod
+    def _offer(queue: asyncio.Queue, change: dict) -> None:
+        try:
+            queue.put_nowait(change)
+        except asyncio.QueueFull:
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait({"op": "resync"})
+
+change_hub = ChangeHub()
@@ -12,4 +12,99 @@ SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "1440"))
 
+# Apply pending schema migrations at startup (disable when a release step runs migrations.py)
+MIGRATE_ON_STARTUP = os.getenv("MIGRATE_ON_STARTUP", "true").lower() == "true"
+
+# Read replicas for the event GET routes: comma-separated connection strings. A replica
+# gets reads while its replay lag is at most REPLICA_MAX_LAG_SECONDS (checked every
+# REPLICA_CHECK_INTERVAL_SECONDS); a user's reads stay on the primary for
+# REPLICA_STICKY_SECONDS after they write, so keep it above lag plus check interval
+DATABASE_REPLICA_URLS = os.getenv("DATABASE_REPLICA_URLS", "")
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "2"))
+REPLICA_CHECK_INTERVAL_SECONDS = float(os.getenv("REPLICA_CHECK_INTERVAL_SECONDS", "1"))
+REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", "5"))
+REPLICA_CONNECT_TIMEOUT = float(os.getenv("REPLICA_CONNECT_TIMEOUT", "1"))
+# Worker processes serving the app; uvicorn also reads it as its --workers default
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+
+# Connection pool settings (timeouts and lifetimes in seconds)
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_MAX_IDLE = float(os.getenv("DB_POOL_MAX_IDLE", "300"))
+DB_POOL_MAX_LIFETIME = float(os.getenv("DB_POOL_MAX_LIFETIME", "3600"))
+
+# Verified-token cache size and the hmac-only verification path for HS* tokens
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+JWT_FAST_PATH = os.getenv("JWT_FAST_PATH", "true").lower() == "true"
+
+# Upper bound on bcrypt hashes computed concurrently off the event loop; hashes beyond
+# BCRYPT_MAX_PENDING (running plus queued) are rejected with 429 instead of queueing
+BCRYPT_MAX_WORKERS = int(os.getenv("BCRYPT_MAX_WORKERS", str(os.cpu_count() or 1)))
+BCRYPT_MAX_PENDING = int(os.getenv("BCRYPT_MAX_PENDING", str(BCRYPT_MAX_WORKERS * 4)))
+
+# bcrypt work factor for new hashes; older hashes are upgraded on the next login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+# Token-bucket limits on /auth/login and /auth/register ("memory" or "redis" backend)
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+LOGIN_IP_BURST = int(os.getenv("LOGIN_IP_BURST", "20"))
+LOGIN_IP_PER_MINUTE = float(os.getenv("LOGIN_IP_PER_MINUTE", "10"))
+LOGIN_EMAIL_BURST = int(os.getenv("LOGIN_EMAIL_BURST", "5"))
+LOGIN_EMAIL_PER_MINUTE = float(os.getenv("LOGIN_EMAIL_PER_MINUTE", "2"))
+REGISTER_IP_BURST = int(os.getenv("REGISTER_IP_BURST", "5"))
+REGISTER_IP_PER_MINUTE = float(os.getenv("REGISTER_IP_PER_MINUTE", "1"))
+
+# Keyset pagination page sizes for event list endpoints
+EVENTS_PAGE_SIZE = int(os.getenv("EVENTS_PAGE_SIZE", "100"))
+EVENTS_MAX_PAGE_SIZE = int(os.getenv("EVENTS_MAX_PAGE_SIZE", "500"))
+
+# Longest window a free/busy query may cover
+FREEBUSY_MAX_DAYS = int(os.getenv("FREEBUSY_MAX_DAYS", "366"))
+
+# Concurrent /events/export downloads (more wait their turn), and how long an export's
+# connection may sit idle waiting for a slow client before the server ends it
+EXPORT_MAX_CONCURRENT = int(os.getenv("EXPORT_MAX_CONCURRENT", "4"))
+EXPORT_IDLE_TIMEOUT_SECONDS = float(os.getenv("EXPORT_IDLE_TIMEOUT_SECONDS", "60"))
+
+# Longest window /events/summary may cover (a year view needs 366)
+SUMMARY_MAX_DAYS = int(os.getenv("SUMMARY_MAX_DAYS", "366"))
+
+# Reminder dispatcher: sinks are a comma-separated subset of log, webhook, websocket
+REMINDERS_ENABLED = os.getenv("REMINDERS_ENABLED", "true").lower() == "true"
+REMINDER_SINKS = os.getenv("REMINDER_SINKS", "log,websocket")
+REMINDER_WEBHOOK_URL = os.getenv("REMINDER_WEBHOOK_URL")
+REMINDER_HORIZON_SECONDS = int(os.getenv("REMINDER_HORIZON_SECONDS", "600"))
+REMINDER_LOAD_INTERVAL_SECONDS = int(os.getenv("REMINDER_LOAD_INTERVAL_SECONDS", "30"))
+REMINDER_GRACE_SECONDS = int(os.getenv("REMINDER_GRACE_SECONDS", "600"))
+REMINDER_RETENTION_DAYS = int(os.getenv("REMINDER_RETENTION_DAYS", "7"))
+
+# Live change stream (needs a direct connection: LISTEN does not work through a transaction pooler)
+CHANGE_STREAM_ENABLED = os.getenv("CHANGE_STREAM_ENABLED", "true").lower() == "true"
+CHANGE_QUEUE_SIZE = int(os.getenv("CHANGE_QUEUE_SIZE", "256"))
+
+# Delete tombstones kept for /events/sync; older sync tokens must start over
+SYNC_TOMBSTONE_RETENTION_DAYS = int(os.getenv("SYNC_TOMBSTONE_RETENTION_DAYS", "30"))
+SYNC_COMPACT_INTERVAL_SECONDS = int(os.getenv("SYNC_COMPACT_INTERVAL_SECONDS", "3600"))
+
+# Instrumentation: METRICS_ENABLED times routes and queries for /metrics; SLOW_QUERY_MS=0
+# turns slow-query logging off; TRACE_SAMPLE_RATE is the fraction of requests traced
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "0"))
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0"))
+
+# Monthly partitions of calendar_events (after "python partitions.py convert"): how far
+# ahead they are kept created and where archived months are written
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "12"))
+PARTITION_MAINTENANCE_INTERVAL_SECONDS = int(os.getenv("PARTITION_MAINTENANCE_INTERVAL_SECONDS", "86400"))
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "archive")
+
+# Read cache for the today/upcoming/month views ("memory" or "redis")
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "60"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
 DATABASE_URL = f"postgresql://{DATABASE_USER}:{DATABASE_PASSWORD}@{DATABASE_HOST}:{DATABASE_PORT}/{DATABASE_NAME}"
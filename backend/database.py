@@ -1,59 +1,101 @@
+import time
+from typing import AsyncIterator, Optional
 import psycopg
+from psycopg.conninfo import make_conninfo
 from psycopg.rows import dict_row
-from config import DATABASE_HOST, DATABASE_PORT, DATABASE_NAME, DATABASE_USER, DATABASE_PASSWORD
+from psycopg_pool import AsyncConnectionPool
+from metrics import GaugeCallback, add_span, db_pool_wait, record_query, register
+from config import (
+    DATABASE_HOST, DATABASE_PORT, DATABASE_NAME, DATABASE_USER, DATABASE_PASSWORD,
+    DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, DB_POOL_TIMEOUT, DB_POOL_MAX_IDLE, DB_POOL_MAX_LIFETIME,
+    METRICS_ENABLED
+)
 
-def get_db_connection():
-    """Create a new database connection."""
-    conn = psycopg.connect(
+_pool: Optional[AsyncConnectionPool] = None
+
+class InstrumentedCursor(psycopg.AsyncCursor):
+    """Cursor that records each statement's time and row count in metrics."""
+
+    async def execute(self, query, params=None, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await super().execute(query, params, **kwargs)
+        finally:
+            record_query(query if isinstance(query, str) else str(query),
+                         time.perf_counter() - started, self.rowcount)
+
+    async def executemany(self, query, params_seq, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await super().executemany(query, params_seq, **kwargs)
+        finally:
+            record_query(query if isinstance(query, str) else str(query),
+                         time.perf_counter() - started, self.rowcount)
+
+def get_conninfo() -> str:
+    """Connection string for the configured database."""
+    return make_conninfo(
         host=DATABASE_HOST,
         port=DATABASE_PORT,
         dbname=DATABASE_NAME,
         user=DATABASE_USER,
-        password=DATABASE_PASSWORD,
-        row_factory=dict_row
+        password=DATABASE_PASSWORD
     )
-    return conn
-
-def init_db():
-    """Initialize database tables."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Create our own calendar_users table (separate from Supabase auth.users)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS calendar_users (
-            id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
-            email VARCHAR(255) UNIQUE NOT NULL,
-            password_hash VARCHAR(255) NOT NULL,
-            created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
-        )
-    """)
-    
-    # Create our own calendar_events table (to avoid FK constraint on Supabase users table)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS calendar_events (
-            id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
-            user_id UUID NOT NULL,
-            title VARCHAR(255) NOT NULL,
-            description TEXT,
-            event_date DATE NOT NULL,
-            start_time TIME NOT NULL,
-            end_time TIME NOT NULL,
-            notify_before INTEGER DEFAULT 10,
-            created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-            updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+
+async def open_pool() -> AsyncConnectionPool:
+    """Create and open the shared async connection pool."""
+    global _pool
+    if _pool is None:
+        _pool = AsyncConnectionPool(
+            conninfo=get_conninfo(),
+            kwargs=connection_kwargs(),
+            min_size=DB_POOL_MIN_SIZE,
+            max_size=DB_POOL_MAX_SIZE,
+            timeout=DB_POOL_TIMEOUT,
+            max_idle=DB_POOL_MAX_IDLE,
+            max_lifetime=DB_POOL_MAX_LIFETIME,
+            check=AsyncConnectionPool.check_connection,
+            open=False
         )
-    """)
-    
-    # Create index for faster event queries
-    cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_calendar_events_user_date ON calendar_events(user_id, event_date)
-    """)
-    
-    conn.commit()
-    cursor.close()
-    conn.close()
-    print("Database initialized successfully!")
-
-if __name__ == "__main__":
-    init_db()
+        await _pool.open()
+    return _pool
+
+async def close_pool():
+    """Close the shared connection pool."""
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+def connection_kwargs() -> dict:
+    kwargs = {"row_factory": dict_row}
+    if METRICS_ENABLED:
+        kwargs["cursor_factory"] = InstrumentedCursor
+    return kwargs
+
+def _pool_stats() -> dict:
+    if _pool is None:
+        return {}
+    stats = _pool.get_stats()
+    return {
+        ("size",): stats.get("pool_size", 0),
+        ("available",): stats.get("pool_available", 0),
+        ("waiting",): stats.get("requests_waiting", 0),
+    }
+
+register(GaugeCallback("db_pool_connections", "Pool connections by state", ("state",), _pool_stats))
+
+def get_pool() -> AsyncConnectionPool:
+    """Return the shared connection pool, which must already be open."""
+    if _pool is None:
+        raise RuntimeError("Database pool is not open")
+    return _pool
+
+async def get_db() -> AsyncIterator[psycopg.AsyncConnection]:
+    """FastAPI dependency that lends a pooled connection for one request."""
+    started = time.perf_counter()
+    async with get_pool().connection() as conn:
+        waited = time.perf_counter() - started
+        db_pool_wait.observe(waited)
+        add_span("pool", "wait", waited)
+        yield conn
@@ -0,0 +1,168 @@
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, time, timedelta
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
+from psycopg import AsyncConnection
+from models import RecurrenceRule
+from recurrence import occurrences
+
+Interval = Tuple[datetime, datetime]
+
+def event_interval(event_date: date, start_time: time, end_time: time) -> Interval:
+    """Return an event's [start, end) span; an end before the start means it runs past midnight."""
+    start = datetime.combine(event_date, start_time)
+    end = datetime.combine(event_date, end_time)
+    if end < start:
+        end += timedelta(days=1)
+    return start, end
+
+def merge_intervals(intervals: Iterable[Interval]) -> List[Interval]:
+    """Merge overlapping or touching intervals into sorted, disjoint blocks."""
+    merged: List[Interval] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+class IntervalIndex:
+    """Sorted interval index answering overlap queries in O(log n + k).
+
+    Busy blocks are merged once so "is this slot free?" is a single bisect.
+    The raw intervals are kept sorted by start with a running maximum of end
+    times, which bounds the backward scan used to list conflicting items.
+    """
+
+    def __init__(self, items: Iterable[Tuple[Interval, Any]]):
+        # Zero-length events occupy no time
+        entries = sorted((item for item in items if item[0][1] > item[0][0]), key=lambda item: item[0])
+        self._starts = [interval[0] for interval, _ in entries]
+        self._entries = entries
+        self._max_end: List[datetime] = []
+        for (_, end), _ in entries:
+            self._max_end.append(max(end, self._max_end[-1]) if self._max_end else end)
+
+        self.busy = merge_intervals(interval for interval, _ in entries)
+        self._busy_starts = [start for start, _ in self.busy]
+
+    def is_free(self, start: datetime, end: datetime) -> bool:
+        """Return True when no interval overlaps [start, end)."""
+        i = bisect_left(self._busy_starts, end) - 1
+        return i < 0 or self.busy[i][1] <= start
+
+    def overlapping(self, start: datetime, end: datetime) -> List[Any]:
+        """Return the items whose intervals overlap [start, end)."""
+        found = []
+        i = bisect_left(self._starts, end) - 1
+        # Once the running max end is <= start, nothing earlier can overlap
+        while i >= 0 and self._max_end[i] > start:
+            (item_start, item_end), item = self._entries[i]
+            if item_end > start and item_start < end:
+                found.append(item)
+            i -= 1
+        found.reverse()
+        return found
+
+    def busy_between(self, start: datetime, end: datetime) -> List[Interval]:
+        """Return merged busy blocks clipped to [start, end)."""
+        first = max(bisect_right(self._busy_starts, start) - 1, 0)
+        blocks = []
+        for block_start, block_end in self.busy[first:]:
+            if block_start >= end:
+                break
+            if block_end > start:
+                blocks.append((max(block_start, start), min(block_end, end)))
+        return blocks
+
+async def load_busy(
+    conn: AsyncConnection,
+    user_ids: Sequence[str],
+    start: datetime,
+    end: datetime,
+    exclude_id: Optional[str] = None
+) -> IntervalIndex:
+    """Build an interval index of the users' events overlapping [start, end).
+
+    Single events come from the GiST index on time_range; the redundant
+    event_date bounds let a partitioned table skip other months. Series are
+    expanded over the covering days, starting a day early for ones that run
+    past midnight.
+    """
+    first_day = start.date() - timedelta(days=1)
+    last_day = end.date() + timedelta(days=1)
+    exclude = " AND id <> %s" if exclude_id is not None else ""
+    extra = [exclude_id] if exclude_id is not None else []
+
+    async with conn.cursor() as cursor:
+        await cursor.execute(
+            f"""SELECT id, event_date, start_time, end_time FROM calendar_events
+                WHERE user_id = ANY(%s) AND recurrence IS NULL
+                AND time_range && tsrange(%s, %s)
+                AND event_date >= %s AND event_date < %s{exclude}""",
+            [list(user_ids), start, end, first_day, last_day] + extra
+        )
+        events = await cursor.fetchall()
+
+        await cursor.execute(
+            f"""SELECT id, event_date, start_time, end_time, recurrence FROM calendar_events
+                WHERE user_id = ANY(%s) AND recurrence IS NOT NULL
+                AND event_date < %s AND (recurrence_end IS NULL OR recurrence_end >= %s){exclude}""",
+            [list(user_ids), last_day, first_day] + extra
+        )
+        series = await cursor.fetchall()
+
+    items = [(event_interval(e["event_date"], e["start_time"], e["end_time"]), e["id"]) for e in events]
+    for row in series:
+        rule = RecurrenceRule(**row["recurrence"])
+        for day in occurrences(rule, row["event_date"], first_day, last_day):
+            items.append((event_interval(day, row["start_time"], row["end_time"]), row["id"]))
+    return IntervalIndex(items)
+
+def find_slots(
+    busy: List[Interval],
+    days: Iterable[date],
+    work_start: time,
+    work_end: time,
+    slot_length: timedelta,
+    step: timedelta,
+    buffer_before: timedelta = timedelta(0),
+    buffer_after: timedelta = timedelta(0),
+    not_before: Optional[datetime] = None
+) -> List[Interval]:
+    """Return bookable slots inside each day's working hours in one sweep.
+
+    busy must be sorted and merged. Buffers are applied by widening busy
+    blocks, so a slot needs buffer_before free time ahead of it and
+    buffer_after behind it. Slots sit on a grid of step from work_start.
+    Both days and busy blocks are walked once in order.
+    """
+    widened = merge_intervals((s - buffer_after, e + buffer_before) for s, e in busy)
+    slots: List[Interval] = []
+    i = 0
+    for day in days:
+        window_start = datetime.combine(day, work_start)
+        window_end = datetime.combine(day, work_end)
+        while i < len(widened) and widened[i][1] <= window_start:
+            i += 1
+
+        cursor = window_start
+        j = i
+        while cursor < window_end:
+            free_end = window_end
+            if j < len(widened) and widened[j][0] < window_end:
+                free_end = max(widened[j][0], cursor)
+
+            # First grid point at or after the free segment's start
+            offset = cursor - window_start
+            t = window_start + -(-offset // step) * step
+            while t + slot_length <= free_end:
+                if not_before is None or t >= not_before:
+                    slots.append((t, t + slot_length))
+                t += step
+
+            if free_end == window_end:
+                break
+            cursor = max(cursor, widened[j][1])
+            j += 1
+    return slots
@@ -1,8 +1,19 @@
+import time
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from routers import auth, events
-from database import init_db
+from fastapi.responses import JSONResponse, PlainTextResponse
+from routers import auth, events, availability, reminders
+from database import open_pool, close_pool
+from migrations import migrate
+from auth import shutdown_hash_executor
+from cache import event_cache
+from reminders import reminder_scheduler, websocket_sink, WEBSOCKET_CHANNEL
+from changes import change_hub, CHANNEL
+from sync import tombstone_compactor
+from partitions import partition_maintainer
+from replicas import replica_router
+import metrics
+from config import REMINDERS_ENABLED, CHANGE_STREAM_ENABLED, METRICS_ENABLED, MIGRATE_ON_STARTUP
 
 app = FastAPI(
     title="Calendar API",
@@ -20,10 +31,34 @@ app.add_middleware(
     expose_headers=["*"]
 )
 
+def _route_label(request: Request) -> str:
+    """Route template (/events/{event_id}) so labels stay low-cardinality."""
+    route = request.scope.get("route")
+    return getattr(route, "path", "unmatched")
+
+# Per-route latency histogram and sampled traces. Streaming responses are
+# timed until their headers are sent.
+if METRICS_ENABLED:
+    @app.middleware("http")
+    async def record_request_metrics(request: Request, call_next):
+        trace = metrics.start_trace()
+        started = time.perf_counter()
+        status_code = 500
+        try:
+            response = await call_next(request)
+            status_code = response.status_code
+            return response
+        finally:
+            duration = time.perf_counter() - started
+            route = _route_label(request)
+            metrics.http_request_duration.observe(duration, request.method, route, str(status_code))
+            metrics.finish_trace(trace, request.method, route, status_code, duration)
+
 # Global exception handler to ensure CORS headers are sent on errors
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     print(f"Global exception: {exc}")
+    metrics.http_unhandled_errors.inc(_route_label(request))
     return JSONResponse(
         status_code=500,
         content={"detail": "Internal server error"},
@@ -37,15 +72,42 @@ async def global_exception_handler(request: Request, exc: Exception):
 # Include routers
 app.include_router(auth.router)
 app.include_router(events.router)
+app.include_router(availability.router)
+app.include_router(reminders.router)
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize database on startup."""
-    try:
-        init_db()
-        print("Database initialized successfully!")
-    except Exception as e:
-        print(f"Database initialization error: {e}")
+    """Open the pool and apply pending migrations on startup."""
+    await open_pool()
+    await replica_router.open()
+    if MIGRATE_ON_STARTUP:
+        try:
+            await migrate()
+            print("Database schema is up to date")
+        except Exception as e:
+            print(f"Database migration error: {e}")
+    if REMINDERS_ENABLED:
+        reminder_scheduler.start()
+    if CHANGE_STREAM_ENABLED:
+        change_hub.listen(CHANNEL, change_hub.dispatch)
+    # Every worker listens, since the one firing a reminder may not hold the user's socket
+    if websocket_sink in reminder_scheduler.sinks:
+        change_hub.listen(WEBSOCKET_CHANNEL, websocket_sink.deliver)
+    if change_hub.channels:
+        change_hub.start()
+    tombstone_compactor.start()
+    partition_maintainer.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release pooled database connections on shutdown."""
+    await reminder_scheduler.stop()
+    await change_hub.stop()
+    await tombstone_compactor.stop()
+    await partition_maintainer.stop()
+    await replica_router.close()
+    await close_pool()
+    shutdown_hash_executor()
 
 @app.get("/")
 async def root():
@@ -56,3 +118,13 @@ async def root():
 async def health_check():
     """Health check endpoint."""
     return {"status": "healthy"}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Request, query, pool and bcrypt metrics in Prometheus text format."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Event read cache hit/miss counters for this worker."""
+    return event_cache.stats()
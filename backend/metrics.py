@@ -0,0 +1,210 @@
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from config import SLOW_QUERY_MS, TRACE_SAMPLE_RATE
+
+# Seconds; wide enough to cover both cached reads and bcrypt
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[str, ...]
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(names: Sequence[str], values: Labels, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+class Counter:
+    """Monotonic counter per label set."""
+
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {value}" for labels, value in items]
+
+class Histogram:
+    """Cumulative-bucket histogram per label set, as Prometheus expects."""
+
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> (per-bucket counts with a trailing +Inf slot, sum)
+        self._values: Dict[Labels, Tuple[List[int], float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(labels) or ([0] * (len(self.buckets) + 1), 0.0)
+            counts[index] += 1
+            self._values[labels] = (counts, total + value)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = [(labels, list(counts), total) for labels, (counts, total) in self._values.items()]
+        lines = []
+        for labels, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                bucket_labels = _format_labels(self.labelnames, labels, 'le="' + le + '"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+class GaugeCallback:
+    """Gauge read from a callback at scrape time."""
+
+    type = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str],
+                 callback: Callable[[], Dict[Labels, float]]):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+
+    def samples(self) -> List[str]:
+        try:
+            values = self.callback()
+        except Exception:
+            return []
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {value}" for labels, value in values.items()]
+
+_registry: List = []
+
+def register(metric):
+    _registry.append(metric)
+    return metric
+
+def render() -> str:
+    """Every registered metric in Prometheus text exposition format."""
+    lines = []
+    for metric in _registry:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        lines.extend(metric.samples())
+    return "\n".join(lines) + "\n"
+
+http_request_duration = register(Histogram(
+    "http_request_duration_seconds", "Time to produce a response, by route template",
+    ("method", "route", "status")
+))
+http_unhandled_errors = register(Counter(
+    "http_unhandled_errors_total", "Requests that ended in the global exception handler", ("route",)
+))
+db_query_duration = register(Histogram(
+    "db_query_duration_seconds", "Query execution time, by statement and table", ("query",)
+))
+db_query_rows = register(Counter(
+    "db_query_rows_total", "Rows returned or affected, by statement and table", ("query",)
+))
+db_pool_wait = register(Histogram(
+    "db_pool_wait_seconds", "Time a request waited for a pooled connection"
+))
+bcrypt_duration = register(Histogram(
+    "bcrypt_duration_seconds", "bcrypt hash/verify time including executor queueing", ("op",)
+))
+
+# Spans collected for the current request when it was picked for tracing
+_trace: ContextVar[Optional[List[dict]]] = ContextVar("trace", default=None)
+
+def start_trace() -> Optional[object]:
+    """Sample the current request for tracing; returns a token for finish_trace."""
+    if TRACE_SAMPLE_RATE <= 0 or random.random() >= TRACE_SAMPLE_RATE:
+        return None
+    return _trace.set([])
+
+def finish_trace(token: Optional[object], method: str, route: str, status: int, duration: float) -> None:
+    """Print the sampled request's spans as one JSON line."""
+    if token is None:
+        return
+    spans = _trace.get()
+    _trace.reset(token)
+    print(json.dumps({
+        "trace_id": uuid.uuid4().hex,
+        "method": method,
+        "route": route,
+        "status": status,
+        "duration_ms": round(duration * 1000, 3),
+        "spans": spans,
+    }))
+
+def add_span(kind: str, name: str, duration: float, **fields) -> None:
+    spans = _trace.get()
+    if spans is not None:
+        spans.append({"kind": kind, "name": name, "duration_ms": round(duration * 1000, 3), **fields})
+
+_QUERY_TARGET = re.compile(r"\b(?:FROM|INTO|UPDATE|TABLE|ON)\s+([a-z_][a-z0-9_]*)", re.IGNORECASE)
+
+@lru_cache(maxsize=1024)
+def query_label(sql: str) -> str:
+    """Low-cardinality label for a statement: its verb and first table."""
+    verb = sql.split(None, 1)[0].upper() if sql.strip() else ""
+    match = _QUERY_TARGET.search(sql)
+    return f"{verb} {match.group(1)}" if match else verb
+
+def record_query(sql: str, duration: float, rows: int) -> None:
+    """Record one executed statement; logs it when slower than SLOW_QUERY_MS."""
+    label = query_label(sql)
+    db_query_duration.observe(duration, label)
+    if rows > 0:
+        db_query_rows.inc(label, amount=rows)
+    add_span("db", label, duration, rows=rows)
+    if SLOW_QUERY_MS and duration * 1000 >= SLOW_QUERY_MS:
+        print(json.dumps({
+            "slow_query": label,
+            "duration_ms": round(duration * 1000, 3),
+            "rows": rows,
+            "sql": " ".join(sql.split())[:500],
+        }))
+
+def timed(histogram: Histogram, span_kind: str, *labels: str):
+    """Context manager observing elapsed seconds into histogram and the trace."""
+    return _Timer(histogram, span_kind, labels)
+
+class _Timer:
+    def __init__(self, histogram: Histogram, span_kind: str, labels: Labels):
+        self.histogram = histogram
+        self.span_kind = span_kind
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        duration = time.perf_counter() - self.started
+        self.histogram.observe(duration, *self.labels)
+        add_span(self.span_kind, " ".join(self.labels) or self.histogram.name, duration)
+        return False
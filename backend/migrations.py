@@ -0,0 +1,432 @@
+import asyncio
+import re
+from typing import List, NamedTuple, Sequence, Tuple
+import psycopg
+from psycopg.rows import dict_row
+from database import get_conninfo
+
+# Arbitrary key for pg_try_advisory_lock; only one process migrates at a time
+MIGRATION_LOCK_KEY = 4_857_203_116
+
+class Migration(NamedTuple):
+    """One schema version.
+
+    statements run in a single transaction together with the version record.
+    indexes are (index name, statement) pairs run one at a time outside a
+    transaction so they can use CREATE/DROP INDEX CONCURRENTLY; a migration
+    should use one or the other. A concurrent build that failed part way
+    leaves an invalid index behind, which is dropped before the retry.
+    Postgres cannot build concurrently on a partitioned table, so on one
+    the statement runs without CONCURRENTLY and blocks writes while it builds.
+    """
+    version: int
+    name: str
+    statements: Sequence[str] = ()
+    indexes: Sequence[Tuple[str, str]] = ()
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "baseline schema", [
+        # Our own calendar_users table (separate from Supabase auth.users)
+        """CREATE TABLE IF NOT EXISTS calendar_users (
+               id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+               email VARCHAR(255) UNIQUE NOT NULL,
+               password_hash VARCHAR(255) NOT NULL,
+               created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+           )""",
+
+        # Our own calendar_events table (to avoid FK constraint on Supabase users table)
+        """CREATE TABLE IF NOT EXISTS calendar_events (
+               id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+               user_id UUID NOT NULL,
+               title VARCHAR(255) NOT NULL,
+               description TEXT,
+               event_date DATE NOT NULL,
+               start_time TIME NOT NULL,
+               end_time TIME NOT NULL,
+               notify_before INTEGER DEFAULT 10,
+               created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+               updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+           )""",
+
+        # Recurring series: the rule and the last date it can occur on (NULL = never ends)
+        "ALTER TABLE calendar_events ADD COLUMN IF NOT EXISTS recurrence JSONB",
+        "ALTER TABLE calendar_events ADD COLUMN IF NOT EXISTS recurrence_end DATE",
+
+        # Occupied time span for overlap queries; an end before the start runs past midnight
+        "CREATE EXTENSION IF NOT EXISTS btree_gist",
+        """ALTER TABLE calendar_events ADD COLUMN IF NOT EXISTS time_range TSRANGE
+           GENERATED ALWAYS AS (
+               CASE WHEN end_time >= start_time
+                    THEN tsrange(event_date + start_time, event_date + end_time)
+                    ELSE tsrange(event_date + start_time, event_date + 1 + end_time)
+               END
+           ) STORED""",
+
+        # When a single event's reminder is due; series reminders are computed per occurrence
+        """ALTER TABLE calendar_events ADD COLUMN IF NOT EXISTS remind_at TIMESTAMP
+           GENERATED ALWAYS AS (event_date + start_time - notify_before * INTERVAL '1 minute') STORED""",
+
+        # Reminders already dispatched, so restarts and other workers never fire them twice
+        """CREATE TABLE IF NOT EXISTS calendar_reminders_sent (
+               event_id UUID NOT NULL,
+               remind_at TIMESTAMP NOT NULL,
+               sent_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+               PRIMARY KEY (event_id, remind_at)
+           )""",
+
+        # Full-text search over title (weight A) and description (weight B)
+        "CREATE EXTENSION IF NOT EXISTS btree_gin",
+        """ALTER TABLE calendar_events ADD COLUMN IF NOT EXISTS search_vector TSVECTOR
+           GENERATED ALWAYS AS (
+               setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+               setweight(to_tsvector('english', coalesce(description, '')), 'B')
+           ) STORED""",
+
+        # Per-user change counter backing the list endpoints' ETags and the sync sequence.
+        # Tokens older than compacted_seq may have missed tombstones that were purged.
+        """CREATE TABLE IF NOT EXISTS calendar_event_versions (
+               user_id UUID PRIMARY KEY,
+               version BIGINT NOT NULL DEFAULT 0
+           )""",
+        "ALTER TABLE calendar_event_versions ADD COLUMN IF NOT EXISTS compacted_seq BIGINT NOT NULL DEFAULT 0",
+
+        # Sync sequence: each write takes the user's next version. The counter row stays
+        # locked until commit, so a user's sequence numbers become visible in order.
+        "ALTER TABLE calendar_events ADD COLUMN IF NOT EXISTS change_seq BIGINT NOT NULL DEFAULT 0",
+        """CREATE TABLE IF NOT EXISTS calendar_event_tombstones (
+               id UUID PRIMARY KEY,
+               user_id UUID NOT NULL,
+               change_seq BIGINT NOT NULL,
+               deleted_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+           )""",
+        """CREATE OR REPLACE FUNCTION next_calendar_change_seq(uid UUID) RETURNS BIGINT AS $$
+               INSERT INTO calendar_event_versions (user_id, version) VALUES (uid, 1)
+               ON CONFLICT (user_id) DO UPDATE SET version = calendar_event_versions.version + 1
+               RETURNING version
+           $$ LANGUAGE sql""",
+        """CREATE OR REPLACE FUNCTION stamp_calendar_event_change() RETURNS trigger AS $$
+           BEGIN
+               NEW.change_seq := next_calendar_change_seq(NEW.user_id);
+               RETURN NEW;
+           END;
+           $$ LANGUAGE plpgsql""",
+        """CREATE OR REPLACE FUNCTION record_calendar_event_tombstone() RETURNS trigger AS $$
+           BEGIN
+               INSERT INTO calendar_event_tombstones (id, user_id, change_seq)
+               VALUES (OLD.id, OLD.user_id, next_calendar_change_seq(OLD.user_id))
+               ON CONFLICT (id) DO UPDATE SET change_seq = EXCLUDED.change_seq, deleted_at = NOW();
+               RETURN NULL;
+           END;
+           $$ LANGUAGE plpgsql""",
+
+        # The per-row triggers also advance the ETag counter, replacing the
+        # earlier statement-level version triggers
+        "DROP TRIGGER IF EXISTS trg_calendar_events_version_insert ON calendar_events",
+        "DROP TRIGGER IF EXISTS trg_calendar_events_version_update ON calendar_events",
+        "DROP TRIGGER IF EXISTS trg_calendar_events_version_delete ON calendar_events",
+        "DROP FUNCTION IF EXISTS bump_calendar_event_version()",
+        "DROP TRIGGER IF EXISTS trg_calendar_events_change_seq ON calendar_events",
+        """CREATE TRIGGER trg_calendar_events_change_seq
+           BEFORE INSERT OR UPDATE ON calendar_events
+           FOR EACH ROW EXECUTE FUNCTION stamp_calendar_event_change()""",
+        "DROP TRIGGER IF EXISTS trg_calendar_events_tombstone ON calendar_events",
+        """CREATE TRIGGER trg_calendar_events_tombstone
+           AFTER DELETE ON calendar_events
+           FOR EACH ROW EXECUTE FUNCTION record_calendar_event_tombstone()""",
+
+        # Push every change to LISTEN calendar_events; the row rides along unless it
+        # would exceed the NOTIFY payload limit, in which case clients fetch it by id
+        """CREATE OR REPLACE FUNCTION notify_calendar_event_change() RETURNS trigger AS $$
+           DECLARE
+               row_data calendar_events%ROWTYPE;
+               payload TEXT;
+           BEGIN
+               IF TG_OP = 'DELETE' THEN
+                   row_data := OLD;
+               ELSE
+                   row_data := NEW;
+               END IF;
+               payload := json_build_object(
+                   'op', lower(TG_OP),
+                   'id', row_data.id,
+                   'user_id', row_data.user_id,
+                   'event', CASE WHEN TG_OP = 'DELETE' THEN NULL
+                            ELSE to_jsonb(row_data) - 'time_range' - 'remind_at' - 'recurrence_end'
+                                 - 'search_vector' END
+               )::text;
+               IF octet_length(payload) > 7900 THEN
+                   payload := json_build_object(
+                       'op', lower(TG_OP), 'id', row_data.id, 'user_id', row_data.user_id
+                   )::text;
+               END IF;
+               PERFORM pg_notify('calendar_events', payload);
+               RETURN NULL;
+           END;
+           $$ LANGUAGE plpgsql""",
+        "DROP TRIGGER IF EXISTS trg_calendar_events_notify ON calendar_events",
+        """CREATE TRIGGER trg_calendar_events_notify
+           AFTER INSERT OR UPDATE OR DELETE ON calendar_events
+           FOR EACH ROW EXECUTE FUNCTION notify_calendar_event_change()""",
+    ]),
+
+    Migration(2, "calendar_events indexes", indexes=[
+        ("idx_calendar_events_user_series",
+         """CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_calendar_events_user_series
+            ON calendar_events(user_id, event_date) WHERE recurrence IS NOT NULL"""),
+        ("idx_calendar_events_user_time_range",
+         """CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_calendar_events_user_time_range
+            ON calendar_events USING gist (user_id, time_range)"""),
+        ("idx_calendar_events_remind_at",
+         """CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_calendar_events_remind_at
+            ON calendar_events(remind_at) WHERE recurrence IS NULL"""),
+        ("idx_calendar_events_updated_at",
+         "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_calendar_events_updated_at ON calendar_events(updated_at)"),
+        # Covering index for date-window queries: matches their ORDER BY and carries the
+        # response columns so range scans can be index-only. description is left out
+        # because unbounded TEXT can exceed the btree row size limit.
+        ("idx_calendar_events_user_date_time",
+         """CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_calendar_events_user_date_time
+            ON calendar_events(user_id, event_date, start_time)
+            INCLUDE (id, title, end_time, notify_before, created_at, updated_at)"""),
+        # Superseded by the covering index above
+        ("idx_calendar_events_user_date",
+         "DROP INDEX CONCURRENTLY IF EXISTS idx_calendar_events_user_date"),
+        # btree_gin puts user_id in the same GIN index, so a search only touches the user's own entries
+        ("idx_calendar_events_user_search",
+         """CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_calendar_events_user_search
+            ON calendar_events USING gin (user_id, search_vector)"""),
+        ("idx_calendar_events_user_change_seq",
+         """CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_calendar_events_user_change_seq
+            ON calendar_events(user_id, change_seq, id)"""),
+        ("idx_calendar_event_tombstones_user_change_seq",
+         """CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_calendar_event_tombstones_user_change_seq
+            ON calendar_event_tombstones(user_id, change_seq)"""),
+        ("idx_calendar_event_tombstones_deleted_at",
+         """CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_calendar_event_tombstones_deleted_at
+            ON calendar_event_tombstones(deleted_at)"""),
+    ]),
+
+    # The stream and its clients speak create/update/delete; TG_OP says insert
+    Migration(3, "change stream op names", [
+        """CREATE OR REPLACE FUNCTION notify_calendar_event_change() RETURNS trigger AS $$
+           DECLARE
+               row_data calendar_events%ROWTYPE;
+               op TEXT;
+               payload TEXT;
+           BEGIN
+               IF TG_OP = 'DELETE' THEN
+                   row_data := OLD;
+               ELSE
+                   row_data := NEW;
+               END IF;
+               op := CASE TG_OP WHEN 'INSERT' THEN 'create' WHEN 'UPDATE' THEN 'update' ELSE 'delete' END;
+               payload := json_build_object(
+                   'op', op,
+                   'id', row_data.id,
+                   'user_id', row_data.user_id,
+                   'event', CASE WHEN TG_OP = 'DELETE' THEN NULL
+                            ELSE to_jsonb(row_data) - 'time_range' - 'remind_at' - 'recurrence_end'
+                                 - 'search_vector' END
+               )::text;
+               IF octet_length(payload) > 7900 THEN
+                   payload := json_build_object('op', op, 'id', row_data.id, 'user_id', row_data.user_id)::text;
+               END IF;
+               PERFORM pg_notify('calendar_events', payload);
+               RETURN NULL;
+           END;
+           $$ LANGUAGE plpgsql""",
+    ]),
+
+    # On a partitioned table an UPDATE that changes event_date's month runs as a
+    # DELETE plus an INSERT, and only the AFTER DELETE/INSERT triggers fire. The
+    # delete half must not tombstone or announce a row that still exists; the
+    # insert half is announced as a create, which clients apply by id.
+    Migration(4, "ignore partition moves in delete triggers", [
+        """CREATE OR REPLACE FUNCTION record_calendar_event_tombstone() RETURNS trigger AS $$
+           BEGIN
+               IF EXISTS (SELECT 1 FROM calendar_events WHERE id = OLD.id) THEN
+                   RETURN NULL;
+               END IF;
+               INSERT INTO calendar_event_tombstones (id, user_id, change_seq)
+               VALUES (OLD.id, OLD.user_id, next_calendar_change_seq(OLD.user_id))
+               ON CONFLICT (id) DO UPDATE SET change_seq = EXCLUDED.change_seq, deleted_at = NOW();
+               RETURN NULL;
+           END;
+           $$ LANGUAGE plpgsql""",
+        """CREATE OR REPLACE FUNCTION notify_calendar_event_change() RETURNS trigger AS $$
+           DECLARE
+               row_data calendar_events%ROWTYPE;
+               op TEXT;
+               payload TEXT;
+           BEGIN
+               IF TG_OP = 'DELETE' THEN
+                   IF EXISTS (SELECT 1 FROM calendar_events WHERE id = OLD.id) THEN
+                       RETURN NULL;
+                   END IF;
+                   row_data := OLD;
+               ELSE
+                   row_data := NEW;
+               END IF;
+               op := CASE TG_OP WHEN 'INSERT' THEN 'create' WHEN 'UPDATE' THEN 'update' ELSE 'delete' END;
+               payload := json_build_object(
+                   'op', op,
+                   'id', row_data.id,
+                   'user_id', row_data.user_id,
+                   'event', CASE WHEN TG_OP = 'DELETE' THEN NULL
+                            ELSE to_jsonb(row_data) - 'time_range' - 'remind_at' - 'recurrence_end'
+                                 - 'search_vector' END
+               )::text;
+               IF octet_length(payload) > 7900 THEN
+                   payload := json_build_object('op', op, 'id', row_data.id, 'user_id', row_data.user_id)::text;
+               END IF;
+               PERFORM pg_notify('calendar_events', payload);
+               RETURN NULL;
+           END;
+           $$ LANGUAGE plpgsql""",
+    ]),
+
+    # Window queries also select description and recurrence, which the INCLUDE list
+    # could not hold, so it never gave index-only scans and only cost writes and space
+    Migration(5, "plain date window index", indexes=[
+        ("idx_calendar_events_user_date_start",
+         """CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_calendar_events_user_date_start
+            ON calendar_events(user_id, event_date, start_time)"""),
+        ("idx_calendar_events_user_date_time",
+         "DROP INDEX CONCURRENTLY IF EXISTS idx_calendar_events_user_date_time"),
+    ]),
+
+    # Whose availability a user may query: owner_id has shared theirs with viewer_id
+    Migration(6, "availability shares", [
+        """CREATE TABLE IF NOT EXISTS calendar_availability_shares (
+               owner_id UUID NOT NULL REFERENCES calendar_users(id) ON DELETE CASCADE,
+               viewer_id UUID NOT NULL REFERENCES calendar_users(id) ON DELETE CASCADE,
+               created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+               PRIMARY KEY (owner_id, viewer_id)
+           )""",
+    ]),
+
+    # A cross-partition move is an edit of an existing id, so its insert half is
+    # announced as an update. The delete half, whose AFTER trigger fires first,
+    # leaves the moved id in a transaction-local setting for the insert half.
+    Migration(7, "announce partition moves as updates", [
+        """CREATE OR REPLACE FUNCTION notify_calendar_event_change() RETURNS trigger AS $$
+           DECLARE
+               row_data calendar_events%ROWTYPE;
+               op TEXT;
+               payload TEXT;
+           BEGIN
+               IF TG_OP = 'DELETE' THEN
+                   IF EXISTS (SELECT 1 FROM calendar_events WHERE id = OLD.id) THEN
+                       PERFORM set_config('calendar_events.moved_id', OLD.id::text, true);
+                       RETURN NULL;
+                   END IF;
+                   row_data := OLD;
+               ELSE
+                   row_data := NEW;
+               END IF;
+               op := CASE TG_OP WHEN 'INSERT' THEN 'create' WHEN 'UPDATE' THEN 'update' ELSE 'delete' END;
+               IF TG_OP = 'INSERT' AND current_setting('calendar_events.moved_id', true) = NEW.id::text THEN
+                   op := 'update';
+                   PERFORM set_config('calendar_events.moved_id', '', true);
+               END IF;
+               payload := json_build_object(
+                   'op', op,
+                   'id', row_data.id,
+                   'user_id', row_data.user_id,
+                   'event', CASE WHEN TG_OP = 'DELETE' THEN NULL
+                            ELSE to_jsonb(row_data) - 'time_range' - 'remind_at' - 'recurrence_end'
+                                 - 'search_vector' END
+               )::text;
+               IF octet_length(payload) > 7900 THEN
+                   payload := json_build_object('op', op, 'id', row_data.id, 'user_id', row_data.user_id)::text;
+               END IF;
+               PERFORM pg_notify('calendar_events', payload);
+               RETURN NULL;
+           END;
+           $$ LANGUAGE plpgsql""",
+    ]),
+]
+
+async def migrate() -> List[int]:
+    """Bring the schema up to the latest migration; returns the versions applied.
+
+    When the schema is current this is one query. Otherwise the process that
+    wins the advisory lock applies the pending migrations while the others
+    wait, then find nothing left to do. The lock is polled with
+    pg_try_advisory_lock: a session blocked inside pg_advisory_lock holds a
+    snapshot that CREATE INDEX CONCURRENTLY would wait on forever.
+    """
+    latest = MIGRATIONS[-1].version
+    conn = await psycopg.AsyncConnection.connect(get_conninfo(), autocommit=True, row_factory=dict_row)
+    async with conn:
+        if latest in await _applied_versions(conn):
+            return []
+
+        while not (await (await conn.execute(
+            "SELECT pg_try_advisory_lock(%s) AS locked", (MIGRATION_LOCK_KEY,)
+        )).fetchone())["locked"]:
+            await asyncio.sleep(1)
+        try:
+            await conn.execute("""
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    applied_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+                )
+            """)
+            applied = await _applied_versions(conn)
+            done = []
+            for migration in MIGRATIONS:
+                if migration.version in applied:
+                    continue
+                print(f"Applying migration {migration.version}: {migration.name}")
+                await _apply(conn, migration)
+                done.append(migration.version)
+            return done
+        finally:
+            await conn.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_KEY,))
+
+async def _applied_versions(conn: psycopg.AsyncConnection) -> set:
+    cursor = await conn.execute("SELECT to_regclass('schema_migrations') IS NOT NULL AS present")
+    if not (await cursor.fetchone())["present"]:
+        return set()
+    cursor = await conn.execute("SELECT version FROM schema_migrations")
+    return {row["version"] for row in await cursor.fetchall()}
+
+_INDEX_TABLE = re.compile(r"\bON\s+(\w+)", re.IGNORECASE)
+
+async def _targets_partitioned_table(conn: psycopg.AsyncConnection, name: str, statement: str) -> bool:
+    # CREATE names its table; DROP names the index, which is partitioned along with it
+    match = _INDEX_TABLE.search(statement)
+    cursor = await conn.execute(
+        "SELECT relkind IN ('p', 'I') AS partitioned FROM pg_class WHERE oid = to_regclass(%s)",
+        (match.group(1) if match else name,)
+    )
+    row = await cursor.fetchone()
+    return bool(row and row["partitioned"])
+
+async def _apply(conn: psycopg.AsyncConnection, migration: Migration) -> None:
+    for name, statement in migration.indexes:
+        # A failed concurrent build leaves an invalid index that IF NOT EXISTS would keep
+        cursor = await conn.execute(
+            """SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+               WHERE c.relname = %s AND NOT i.indisvalid""",
+            (name,)
+        )
+        if await cursor.fetchone():
+            await conn.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+        if await _targets_partitioned_table(conn, name, statement):
+            statement = statement.replace(" CONCURRENTLY", "")
+        await conn.execute(statement)
+
+    async with conn.transaction():
+        for statement in migration.statements:
+            await conn.execute(statement)
+        await conn.execute(
+            "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+            (migration.version, migration.name)
+        )
+
+if __name__ == "__main__":
+    applied = asyncio.run(migrate())
+    print(f"Applied migrations: {applied}" if applied else "Schema is up to date")
@@ -1,6 +1,6 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional
-from datetime import date, time
+from pydantic import BaseModel, EmailStr, Field, field_validator
+from typing import List, Literal, Optional
+from datetime import date, datetime, time
 from uuid import UUID
 
 # Auth Models
@@ -24,6 +24,25 @@ class TokenData(BaseModel):
     user_id: Optional[str] = None
 
 # Event Models
+# Bounds on a series' length; longer ones should be open-ended
+MAX_RECURRENCE_COUNT = 1000
+MAX_RECURRENCE_YEARS = 100
+
+class RecurrenceRule(BaseModel):
+    """Subset of RFC 5545 RRULE; the event's own date is the first occurrence."""
+    freq: Literal["daily", "weekly", "monthly"]
+    interval: int = Field(1, ge=1)
+    until: Optional[date] = None
+    count: Optional[int] = Field(None, ge=1, le=MAX_RECURRENCE_COUNT)
+    exdates: List[date] = []
+
+    @field_validator("until")
+    @classmethod
+    def _until_in_range(cls, value: Optional[date]) -> Optional[date]:
+        if value is not None and value.year > date.today().year + MAX_RECURRENCE_YEARS:
+            raise ValueError(f"until may be at most {MAX_RECURRENCE_YEARS} years ahead")
+        return value
+
 class EventCreate(BaseModel):
     title: str
     description: Optional[str] = None
@@ -31,6 +50,7 @@ class EventCreate(BaseModel):
     start_time: time
     end_time: time
     notify_before: Optional[int] = 10  # minutes
+    recurrence: Optional[RecurrenceRule] = None
 
 class EventUpdate(BaseModel):
     title: Optional[str] = None
@@ -39,6 +59,7 @@ class EventUpdate(BaseModel):
     start_time: Optional[time] = None
     end_time: Optional[time] = None
     notify_before: Optional[int] = None
+    recurrence: Optional[RecurrenceRule] = None
 
 class EventResponse(BaseModel):
     id: UUID
@@ -51,3 +72,76 @@ class EventResponse(BaseModel):
     notify_before: int
     created_at: str
     updated_at: str
+    recurrence: Optional[RecurrenceRule] = None
+
+# Bulk Models
+MAX_BULK_ITEMS = 1000
+
+class EventBulkUpdateItem(EventUpdate):
+    id: UUID
+
+class EventBulkCreate(BaseModel):
+    events: List[EventCreate] = Field(..., min_length=1, max_length=MAX_BULK_ITEMS)
+
+class EventBulkUpdate(BaseModel):
+    events: List[EventBulkUpdateItem] = Field(..., min_length=1, max_length=MAX_BULK_ITEMS)
+
+class EventBulkDelete(BaseModel):
+    ids: List[UUID] = Field(..., min_length=1, max_length=MAX_BULK_ITEMS)
+
+class EventBulkResult(BaseModel):
+    id: Optional[UUID] = None
+    status: int
+    event: Optional[EventResponse] = None
+    detail: Optional[str] = None
+
+# Sync Models
+class EventSyncResponse(BaseModel):
+    events: List[EventResponse]  # created or updated since the token
+    deleted: List[UUID]
+    next_token: str
+    has_more: bool  # call again with next_token before treating the client as current
+
+# Summary Models
+class DaySummary(BaseModel):
+    event_date: date
+    count: int
+    busy_minutes: int  # sum of event durations; overlapping events each count
+
+# Free/Busy Models
+class TimeSlot(BaseModel):
+    start: datetime
+    end: datetime
+
+    @field_validator("start", "end")
+    @classmethod
+    def _as_local_time(cls, value: datetime) -> datetime:
+        # Events are stored as naive local times
+        return value.replace(tzinfo=None)
+
+class SlotAvailability(TimeSlot):
+    free: bool
+    conflicts: List[UUID] = []
+
+class FreeBusyRequest(TimeSlot):
+    slots: List[TimeSlot] = Field([], max_length=MAX_BULK_ITEMS)
+
+class FreeBusyResponse(BaseModel):
+    busy: List[TimeSlot]
+    slots: List[SlotAvailability] = []
+
+# Availability Models
+class AvailabilityRequest(BaseModel):
+    user_ids: List[UUID] = Field([], max_length=20)  # empty means the current user
+    start_date: date
+    end_date: date  # exclusive
+    work_start: time = time(9, 0)
+    work_end: time = time(17, 0)
+    working_days: List[int] = [0, 1, 2, 3, 4]  # Monday = 0
+    slot_minutes: int = Field(30, ge=5, le=1440)
+    step_minutes: Optional[int] = Field(None, ge=5, le=1440)
+    buffer_before: int = Field(0, ge=0, le=1440)  # minutes
+    buffer_after: int = Field(0, ge=0, le=1440)  # minutes
+
+class AvailabilityResponse(BaseModel):
+    slots: List[TimeSlot]
@@ -0,0 +1,306 @@
+"""Optional monthly range partitioning of calendar_events by event_date.
+
+    python partitions.py convert [--months-back 24]   # one-off, locks calendar_events while copying
+    python partitions.py ensure                       # create partitions PARTITION_MONTHS_AHEAD ahead
+    python partitions.py archive --before 2025-01-01  # detach old months into gzip NDJSON files
+
+Partitions are calendar_events_YYYY_MM, plus calendar_events_before for
+everything older than the first month at conversion and calendar_events_default
+for dates with no partition yet. The app keeps future partitions created
+once the table is partitioned; nothing changes for an unpartitioned table.
+"""
+import argparse
+import asyncio
+import gzip
+import os
+import re
+from datetime import date
+from typing import List, Optional, Tuple
+import psycopg
+from psycopg import sql
+from psycopg.rows import dict_row
+from database import get_conninfo
+from migrations import MIGRATIONS
+from config import PARTITION_MONTHS_AHEAD, PARTITION_MAINTENANCE_INTERVAL_SECONDS, ARCHIVE_DIR
+
+DEFAULT_PARTITION = "calendar_events_default"
+BEFORE_PARTITION = "calendar_events_before"
+
+# Arbitrary key for pg_try_advisory_lock; only one process maintains partitions at a time
+PARTITION_LOCK_KEY = 4_857_203_117
+
+# How long DETACH/ATTACH and CREATE ... PARTITION OF may wait for their locks
+# before giving up, instead of queueing every query behind them
+PARTITION_LOCK_TIMEOUT = "5s"
+
+_UPPER_BOUND = re.compile(r"TO \('(\d{4}-\d{2}-\d{2})'\)")
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def partition_name(month: date) -> str:
+    return f"calendar_events_{month:%Y_%m}"
+
+async def connect() -> psycopg.AsyncConnection:
+    """Autocommit connection for partition maintenance; transactions are explicit."""
+    return await psycopg.AsyncConnection.connect(get_conninfo(), autocommit=True, row_factory=dict_row)
+
+async def is_partitioned(conn: psycopg.AsyncConnection) -> bool:
+    cursor = await conn.execute(
+        "SELECT relkind = 'p' AS partitioned FROM pg_class WHERE oid = to_regclass('calendar_events')"
+    )
+    row = await cursor.fetchone()
+    return bool(row and row["partitioned"])
+
+async def list_partitions(conn: psycopg.AsyncConnection) -> List[Tuple[str, Optional[date]]]:
+    """Each partition's name and exclusive upper bound (None for the default partition)."""
+    cursor = await conn.execute(
+        """SELECT c.relname AS name, pg_get_expr(c.relpartbound, c.oid) AS bound
+           FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+           WHERE i.inhparent = 'calendar_events'::regclass ORDER BY c.relname"""
+    )
+    partitions = []
+    for row in await cursor.fetchall():
+        match = _UPPER_BOUND.search(row["bound"])
+        partitions.append((row["name"], date.fromisoformat(match.group(1)) if match else None))
+    return partitions
+
+async def _stored_columns(conn: psycopg.AsyncConnection, table: str) -> str:
+    """Comma-separated columns that can be written (generated ones are computed)."""
+    cursor = await conn.execute(
+        """SELECT column_name FROM information_schema.columns
+           WHERE table_name = %s AND is_generated = 'NEVER' ORDER BY ordinal_position""",
+        (table,)
+    )
+    return ", ".join(row["column_name"] for row in await cursor.fetchall())
+
+async def convert(conn: psycopg.AsyncConnection, months_back: int = 24,
+                  months_ahead: int = PARTITION_MONTHS_AHEAD) -> bool:
+    """Rebuild calendar_events as a partitioned table; False if it already is.
+
+    Runs in one transaction holding an exclusive lock, so plan a maintenance
+    window for large tables. The primary key becomes (id, event_date), as
+    Postgres requires the partition key in every unique index.
+    """
+    async with conn.transaction():
+        await conn.execute("LOCK TABLE calendar_events IN ACCESS EXCLUSIVE MODE")
+        if await is_partitioned(conn):
+            return False
+
+        columns = await _stored_columns(conn, "calendar_events")
+        oldest = (await (await conn.execute(
+            "SELECT min(event_date) AS oldest FROM calendar_events"
+        )).fetchone())["oldest"]
+        current = month_start(date.today())
+        first = max(month_start(oldest or current), add_months(current, -months_back))
+
+        await conn.execute("ALTER TABLE calendar_events RENAME TO calendar_events_unpartitioned")
+        await conn.execute("""
+            CREATE TABLE calendar_events
+            (LIKE calendar_events_unpartitioned INCLUDING DEFAULTS INCLUDING GENERATED)
+            PARTITION BY RANGE (event_date)
+        """)
+        await conn.execute(sql.SQL(
+            "CREATE TABLE {} PARTITION OF calendar_events FOR VALUES FROM (MINVALUE) TO ({})"
+        ).format(sql.Identifier(BEFORE_PARTITION), sql.Literal(first)))
+        month = first
+        while month <= add_months(current, months_ahead):
+            await _create_partition(conn, month)
+            month = add_months(month, 1)
+        await conn.execute(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF calendar_events DEFAULT")
+
+        # No triggers exist on the new table yet, so rows keep their change_seq
+        await conn.execute(
+            f"INSERT INTO calendar_events ({columns}) SELECT {columns} FROM calendar_events_unpartitioned"
+        )
+        await conn.execute("DROP TABLE calendar_events_unpartitioned")
+        await conn.execute("ALTER TABLE calendar_events ADD PRIMARY KEY (id, event_date)")
+
+        # Re-run the idempotent migrations in order, so later trigger functions
+        # replace earlier ones and superseded indexes are dropped again
+        for migration in MIGRATIONS:
+            for statement in migration.statements:
+                await conn.execute(statement)
+            for _, statement in migration.indexes:
+                await conn.execute(statement.replace(" CONCURRENTLY", ""))
+    return True
+
+def _bounds(month: date) -> sql.Composed:
+    # DDL cannot take bind parameters, so bounds are inlined as literals
+    return sql.SQL("FOR VALUES FROM ({}) TO ({})").format(
+        sql.Literal(month), sql.Literal(add_months(month, 1))
+    )
+
+async def _create_partition(conn: psycopg.AsyncConnection, month: date) -> None:
+    await conn.execute(sql.SQL("CREATE TABLE IF NOT EXISTS {} PARTITION OF calendar_events {}").format(
+        sql.Identifier(partition_name(month)), _bounds(month)
+    ))
+
+async def ensure_partitions(conn: psycopg.AsyncConnection, months_ahead: int = PARTITION_MONTHS_AHEAD) -> List[str]:
+    """Create any missing monthly partitions from this month to months_ahead; returns their names.
+
+    Every worker runs this, so only the one holding the advisory lock does
+    the work and the others return at once. A month whose locks cannot be
+    had within PARTITION_LOCK_TIMEOUT is left for the next run.
+    """
+    if not await is_partitioned(conn):
+        return []
+    cursor = await conn.execute("SELECT pg_try_advisory_lock(%s) AS locked", (PARTITION_LOCK_KEY,))
+    if not (await cursor.fetchone())["locked"]:
+        return []
+    try:
+        existing = {name for name, _ in await list_partitions(conn)}
+        current = month_start(date.today())
+        created = []
+        for offset in range(months_ahead + 1):
+            month = add_months(current, offset)
+            name = partition_name(month)
+            if name in existing:
+                continue
+            try:
+                await _add_partition(conn, month)
+            except psycopg.errors.LockNotAvailable:
+                print(f"Skipping {name}: calendar_events is busy, retrying on the next run")
+                continue
+            created.append(name)
+        return created
+    finally:
+        await conn.execute("SELECT pg_advisory_unlock(%s)", (PARTITION_LOCK_KEY,))
+
+async def _add_partition(conn: psycopg.AsyncConnection, month: date) -> None:
+    name = partition_name(month)
+    async with conn.transaction():
+        await conn.execute(f"SET LOCAL lock_timeout = '{PARTITION_LOCK_TIMEOUT}'")
+        upper = add_months(month, 1)
+        cursor = await conn.execute(
+            f"SELECT 1 FROM {DEFAULT_PARTITION} WHERE event_date >= %s AND event_date < %s LIMIT 1",
+            (month, upper)
+        )
+        if await cursor.fetchone() is None:
+            await _create_partition(conn, month)
+            return
+        # Rows for this month sit in the default partition. Move them into a
+        # standalone table while both are detached, so no row triggers fire and
+        # change_seq is kept, then attach both back.
+        await conn.execute(f"ALTER TABLE calendar_events DETACH PARTITION {DEFAULT_PARTITION}")
+        await conn.execute(
+            f"CREATE TABLE {name} (LIKE calendar_events INCLUDING DEFAULTS INCLUDING GENERATED)"
+        )
+        columns = await _stored_columns(conn, DEFAULT_PARTITION)
+        await conn.execute(
+            f"""INSERT INTO {name} ({columns}) SELECT {columns} FROM {DEFAULT_PARTITION}
+                WHERE event_date >= %s AND event_date < %s""",
+            (month, upper)
+        )
+        await conn.execute(
+            f"DELETE FROM {DEFAULT_PARTITION} WHERE event_date >= %s AND event_date < %s",
+            (month, upper)
+        )
+        await conn.execute(sql.SQL("ALTER TABLE calendar_events ATTACH PARTITION {} {}").format(
+            sql.Identifier(name), _bounds(month)
+        ))
+        await conn.execute(f"ALTER TABLE calendar_events ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT")
+
+async def archive_partitions(conn: psycopg.AsyncConnection, before: date, archive_dir: str = ARCHIVE_DIR) -> List[str]:
+    """Move partitions wholly before `before` into gzip NDJSON files and drop them.
+
+    A partition still holding a series that runs to `before` or later is
+    skipped, since its occurrences are live. Archived events simply stop
+    appearing; no delete tombstones are written for sync clients.
+    """
+    if not await is_partitioned(conn):
+        raise RuntimeError("calendar_events is not partitioned; run 'python partitions.py convert' first")
+    os.makedirs(archive_dir, exist_ok=True)
+    archived = []
+    for name, upper in await list_partitions(conn):
+        if upper is None or upper > before:
+            continue
+        cursor = await conn.execute(
+            f"""SELECT count(*) AS active FROM {name}
+                WHERE recurrence IS NOT NULL AND (recurrence_end IS NULL OR recurrence_end >= %s)""",
+            (before,)
+        )
+        active = (await cursor.fetchone())["active"]
+        if active:
+            print(f"Skipping {name}: {active} series still running")
+            continue
+
+        # Detach first so no write can land after the export. The default partition
+        # rules out DETACH CONCURRENTLY; lock_timeout keeps the exclusive lock request
+        # from queueing behind long queries.
+        async with conn.transaction():
+            await conn.execute(f"SET LOCAL lock_timeout = '{PARTITION_LOCK_TIMEOUT}'")
+            await conn.execute(f"ALTER TABLE calendar_events DETACH PARTITION {name}")
+
+        path = os.path.join(archive_dir, f"{name}.ndjson.gz")
+        async with conn.cursor() as cur:
+            with gzip.open(path, "wb") as f:
+                async with cur.copy(
+                    f"COPY (SELECT row_to_json(e) FROM {name} e ORDER BY event_date, start_time) TO STDOUT"
+                ) as copy:
+                    async for data in copy:
+                        f.write(data)
+        await conn.execute(f"DROP TABLE {name}")
+        print(f"Archived {name} to {path}")
+        archived.append(name)
+    return archived
+
+class PartitionMaintainer:
+    """Keeps future monthly partitions created while calendar_events is partitioned."""
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                async with await connect() as conn:
+                    created = await ensure_partitions(conn)
+                if created:
+                    print(f"Created event partitions: {', '.join(created)}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Partition maintenance error: {e}")
+            await asyncio.sleep(PARTITION_MAINTENANCE_INTERVAL_SECONDS)
+
+partition_maintainer = PartitionMaintainer()
+
+async def _main(args: argparse.Namespace) -> None:
+    async with await connect() as conn:
+        if args.command == "convert":
+            converted = await convert(conn, args.months_back)
+            print("Converted calendar_events to monthly partitions" if converted else "Already partitioned")
+        elif args.command == "ensure":
+            created = await ensure_partitions(conn)
+            print(f"Created: {', '.join(created)}" if created else "No partitions needed")
+        else:
+            await archive_partitions(conn, date.fromisoformat(args.before), args.archive_dir)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage calendar_events partitions")
+    commands = parser.add_subparsers(dest="command", required=True)
+    convert_parser = commands.add_parser("convert", help="Rebuild calendar_events as a partitioned table")
+    convert_parser.add_argument("--months-back", type=int, default=24,
+                                help="Monthly partitions for this much history; older rows share one partition")
+    commands.add_parser("ensure", help="Create upcoming monthly partitions")
+    archive_parser = commands.add_parser("archive", help="Detach and export months before a date")
+    archive_parser.add_argument("--before", required=True, help="First day to keep (YYYY-MM-DD)")
+    archive_parser.add_argument("--archive-dir", default=ARCHIVE_DIR)
+    asyncio.run(_main(parser.parse_args()))
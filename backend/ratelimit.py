@@ -0,0 +1,113 @@
+import math
+import time
+from collections import OrderedDict
+from typing import Any, Tuple
+from fastapi import HTTPException, Request, status
+from config import (
+    RATE_LIMIT_ENABLED, RATE_LIMIT_BACKEND, RATE_LIMIT_MAX_KEYS, REDIS_URL,
+    LOGIN_IP_BURST, LOGIN_IP_PER_MINUTE, LOGIN_EMAIL_BURST, LOGIN_EMAIL_PER_MINUTE,
+    REGISTER_IP_BURST, REGISTER_IP_PER_MINUTE
+)
+
+class RateLimitBackend:
+    """Token-bucket storage shared by the limiter backends."""
+
+    async def take(self, key: str, capacity: int, rate: float) -> float:
+        """Take one token; return 0 if allowed, else seconds until one is available.
+
+        capacity is the burst size and rate the refill in tokens per second.
+        """
+        raise NotImplementedError
+
+class MemoryRateLimiter(RateLimitBackend):
+    """Per-process buckets, LRU-bounded to max_keys.
+
+    An evicted key starts again with a full bucket, which only matters for
+    keys idle long enough to have refilled anyway.
+    """
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def take(self, key: str, capacity: int, rate: float) -> float:
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (float(capacity), now))
+        tokens = min(float(capacity), tokens + (now - updated) * rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / rate
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+# KEYS[1] bucket; ARGV capacity, rate, now. Returns the wait as a string (Lua numbers become integers).
+_TAKE_SCRIPT = """
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local tokens = tonumber(bucket[1]) or capacity
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return tostring(wait)
+"""
+
+class RedisRateLimiter(RateLimitBackend):
+    """Buckets shared by every worker, updated atomically by a Lua script."""
+
+    def __init__(self, client: Any):
+        self.client = client
+
+    async def take(self, key: str, capacity: int, rate: float) -> float:
+        wait = await self.client.eval(_TAKE_SCRIPT, 1, f"ratelimit:{key}", capacity, rate, time.time())
+        return float(wait.decode("utf-8") if isinstance(wait, bytes) else wait)
+
+def _make_backend() -> RateLimitBackend:
+    if RATE_LIMIT_BACKEND == "redis":
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis requires the redis package")
+        return RedisRateLimiter(redis.from_url(REDIS_URL))
+    return MemoryRateLimiter()
+
+rate_limiter = _make_backend()
+
+async def _enforce(key: str, capacity: int, per_minute: float) -> None:
+    wait = await rate_limiter.take(key, capacity, per_minute / 60)
+    if wait > 0:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many attempts, try again later",
+            headers={"Retry-After": str(math.ceil(wait))}
+        )
+
+def _client_ip(request: Request) -> str:
+    # Behind a proxy, run uvicorn with --proxy-headers so this is the real client
+    return request.client.host if request.client else "unknown"
+
+async def limit_login(request: Request, email: str) -> None:
+    """Throttle login attempts per client IP and per account."""
+    if not RATE_LIMIT_ENABLED:
+        return
+    await _enforce(f"login:ip:{_client_ip(request)}", LOGIN_IP_BURST, LOGIN_IP_PER_MINUTE)
+    await _enforce(f"login:email:{email.lower()}", LOGIN_EMAIL_BURST, LOGIN_EMAIL_PER_MINUTE)
+
+async def limit_register(request: Request) -> None:
+    """Throttle account creation per client IP."""
+    if not RATE_LIMIT_ENABLED:
+        return
+    await _enforce(f"register:ip:{_client_ip(request)}", REGISTER_IP_BURST, REGISTER_IP_PER_MINUTE)
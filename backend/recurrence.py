@@ -0,0 +1,99 @@
+from datetime import date, timedelta
+from typing import Iterator, Optional, Tuple
+from models import RecurrenceRule
+
+def occurrences(
+    rule: RecurrenceRule,
+    dtstart: date,
+    window_start: Optional[date] = None,
+    window_end: Optional[date] = None
+) -> Iterator[date]:
+    """Lazily yield the dates of a series that fall in [window_start, window_end).
+
+    Daily, weekly and open-ended monthly series jump straight to the first
+    occurrence in the window, so expanding a long series only costs the
+    occurrences actually viewed. Without window_end or an until/count bound
+    the generator is infinite; callers must slice it.
+    """
+    exdates = set(rule.exdates)
+    for index, day in _candidates(rule, dtstart, window_start):
+        # count includes excluded dates, as in RFC 5545
+        if rule.count is not None and index >= rule.count:
+            return
+        if rule.until is not None and day > rule.until:
+            return
+        if window_end is not None and day >= window_end:
+            return
+        if window_start is not None and day < window_start:
+            continue
+        if day not in exdates:
+            yield day
+
+def last_occurrence(rule: RecurrenceRule, dtstart: date) -> Optional[date]:
+    """Return an upper bound on the series' last date, or None if it never ends.
+
+    The count-th date is computed directly, except for monthly series starting
+    after the 28th, whose skipped months have to be walked.
+    """
+    if rule.count is None:
+        return rule.until
+    last = _nth_candidate(rule, dtstart, rule.count - 1)
+    if rule.until is not None and (last is None or last > rule.until):
+        return rule.until
+    return last
+
+def _nth_candidate(rule: RecurrenceRule, dtstart: date, n: int) -> Optional[date]:
+    """Date of occurrence index n (date.max past the calendar's end)."""
+    if rule.freq in ("daily", "weekly"):
+        step = rule.interval * (7 if rule.freq == "weekly" else 1)
+        try:
+            return dtstart + timedelta(days=n * step)
+        except OverflowError:
+            return date.max
+    if dtstart.day <= 28:
+        # Every month has this day, so no month is skipped
+        total = dtstart.month - 1 + n * rule.interval
+        year = dtstart.year + total // 12
+        if year > date.max.year:
+            return date.max
+        return date(year, total % 12 + 1, dtstart.day)
+    last = None
+    for index, day in _candidates(rule, dtstart, None):
+        if index > n or (rule.until is not None and day > rule.until):
+            break
+        last = day
+    return last
+
+def _candidates(rule: RecurrenceRule, dtstart: date, window_start: Optional[date]) -> Iterator[Tuple[int, date]]:
+    """Yield (occurrence index, date) pairs, skipping ahead to window_start when possible."""
+    if rule.freq in ("daily", "weekly"):
+        step = rule.interval * (7 if rule.freq == "weekly" else 1)
+        k = 0
+        if window_start is not None and window_start > dtstart:
+            k = -(-(window_start - dtstart).days // step)
+        while True:
+            try:
+                yield k, dtstart + timedelta(days=k * step)
+            except OverflowError:
+                return
+            k += 1
+
+    # Monthly: months without the start's day of month are skipped and do not
+    # count, so the occurrence index can only be skipped ahead when there is no count.
+    k = 0
+    if rule.count is None and window_start is not None and window_start > dtstart:
+        months = (window_start.year - dtstart.year) * 12 + window_start.month - dtstart.month
+        k = months // rule.interval
+    index = k
+    while True:
+        total = dtstart.month - 1 + k * rule.interval
+        year = dtstart.year + total // 12
+        if year > date.max.year:
+            return
+        k += 1
+        try:
+            day = date(year, total % 12 + 1, dtstart.day)
+        except ValueError:
+            continue
+        yield index, day
+        index += 1
@@ -0,0 +1,300 @@
+import asyncio
+import json
+import time
+import urllib.request
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+from fastapi import WebSocket
+from models import RecurrenceRule
+from recurrence import occurrences
+from timing_wheel import TimingWheel
+from database import get_pool
+from config import (
+    REMINDER_SINKS, REMINDER_WEBHOOK_URL, REMINDER_HORIZON_SECONDS,
+    REMINDER_LOAD_INTERVAL_SECONDS, REMINDER_GRACE_SECONDS, REMINDER_RETENTION_DAYS
+)
+
+# Key identifying one reminder: (event id, local time it is due)
+ReminderKey = Tuple[str, datetime]
+
+# Reminders for websocket delivery are published here, since any worker may hold the socket
+WEBSOCKET_CHANNEL = "calendar_reminders"
+
+class ReminderSink:
+    """Destination for fired reminders."""
+
+    async def send(self, reminder: dict) -> None:
+        raise NotImplementedError
+
+class LogSink(ReminderSink):
+    async def send(self, reminder: dict) -> None:
+        print(f"Reminder: {reminder['title']} at {reminder['event_date']} {reminder['start_time']} "
+              f"for user {reminder['user_id']}")
+
+class WebhookSink(ReminderSink):
+    """POST each reminder as JSON to a URL."""
+
+    def __init__(self, url: str):
+        self.url = url
+
+    async def send(self, reminder: dict) -> None:
+        await asyncio.to_thread(self._post, json.dumps(reminder).encode("utf-8"))
+
+    def _post(self, body: bytes) -> None:
+        request = urllib.request.Request(
+            self.url, data=body, headers={"Content-Type": "application/json"}, method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=10):
+            pass
+
+class WebSocketSink(ReminderSink):
+    """Push reminders to the user's open /reminders/ws connections.
+
+    The worker that claims a reminder publishes it with NOTIFY; every worker's
+    change hub hands it to deliver(), which writes to the sockets held there.
+    """
+
+    def __init__(self):
+        self.connections: Dict[str, Set[WebSocket]] = {}
+        self._pending: Set[asyncio.Task] = set()
+
+    def connect(self, user_id: str, websocket: WebSocket) -> None:
+        self.connections.setdefault(user_id, set()).add(websocket)
+
+    def disconnect(self, user_id: str, websocket: WebSocket) -> None:
+        sockets = self.connections.get(user_id)
+        if sockets:
+            sockets.discard(websocket)
+            if not sockets:
+                del self.connections[user_id]
+
+    async def send(self, reminder: dict) -> None:
+        async with get_pool().connection() as conn:
+            await conn.execute("SELECT pg_notify(%s, %s)", (WEBSOCKET_CHANNEL, json.dumps(reminder)))
+
+    def deliver(self, payload: str) -> None:
+        """Change hub handler for WEBSOCKET_CHANNEL."""
+        reminder = json.loads(payload)
+        if reminder["user_id"] not in self.connections:
+            return
+        task = asyncio.create_task(self._push(reminder))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _push(self, reminder: dict) -> None:
+        for websocket in list(self.connections.get(reminder["user_id"], ())):
+            try:
+                await websocket.send_json(reminder)
+            except Exception:
+                self.disconnect(reminder["user_id"], websocket)
+
+websocket_sink = WebSocketSink()
+
+class ReminderScheduler:
+    """Fires notify_before reminders from an in-memory timing wheel.
+
+    Only reminders due within REMINDER_HORIZON_SECONDS are held in memory.
+    They are loaded incrementally through the index on remind_at, plus rows
+    changed since the last load. Series occurrences are expanded one day at
+    a time. Before dispatch each reminder is claimed in calendar_reminders_sent,
+    so a restart or a second worker never fires it twice.
+    """
+
+    def __init__(self, sinks: List[ReminderSink]):
+        self.sinks = sinks
+        self.wheel = TimingWheel(int(time.time()))
+        self._scheduled: Set[ReminderKey] = set()
+        self._loaded_until = datetime.now() - timedelta(seconds=REMINDER_GRACE_SECONDS)
+        self._series_loaded_until = date.today()
+        self._last_scan: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        next_load = 0.0
+        while True:
+            try:
+                if time.monotonic() >= next_load:
+                    await self._load()
+                    next_load = time.monotonic() + REMINDER_LOAD_INTERVAL_SECONDS
+                due = self.wheel.advance(int(time.time()))
+                if due:
+                    await self._fire(due)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Reminder scheduler error: {e}")
+            await asyncio.sleep(1)
+
+    async def _load(self) -> None:
+        """Pull reminders that became due within the horizon since the last load."""
+        horizon = datetime.now() + timedelta(seconds=REMINDER_HORIZON_SECONDS)
+        async with get_pool().connection() as conn:
+            async with conn.cursor() as cursor:
+                # updated_at is a writer's transaction start, so a row committed after
+                # this scan can be older than it; rescan from the oldest open
+                # transaction (sessions of other roles show no xact_start). Rows seen
+                # twice are dropped by _schedule and the claim.
+                await cursor.execute(
+                    """SELECT LEAST(LOCALTIMESTAMP, (
+                           SELECT min(xact_start)::timestamp FROM pg_stat_activity
+                           WHERE datname = current_database() AND pid <> pg_backend_pid()
+                       )) AS now"""
+                )
+                scan_started = (await cursor.fetchone())["now"]
+
+                # New part of the window, then rows edited into the part already loaded
+                await cursor.execute(
+                    """SELECT id, user_id, title, event_date, start_time, remind_at
+                       FROM calendar_events
+                       WHERE recurrence IS NULL AND remind_at >= %s AND remind_at < %s""",
+                    (self._loaded_until, horizon)
+                )
+                rows = await cursor.fetchall()
+                if self._last_scan is not None:
+                    await cursor.execute(
+                        """SELECT id, user_id, title, event_date, start_time, remind_at
+                           FROM calendar_events
+                           WHERE updated_at >= %s AND recurrence IS NULL
+                           AND remind_at >= %s AND remind_at < %s""",
+                        (self._last_scan, datetime.now() - timedelta(seconds=REMINDER_GRACE_SECONDS),
+                         self._loaded_until)
+                    )
+                    rows += await cursor.fetchall()
+
+                # Series: expand the next day once, plus series edited since the last load
+                series_until = horizon.date() + timedelta(days=1)
+                series = []
+                if series_until > self._series_loaded_until:
+                    await cursor.execute(
+                        """SELECT id, user_id, title, event_date, start_time, notify_before, recurrence
+                           FROM calendar_events
+                           WHERE recurrence IS NOT NULL AND event_date < %s
+                           AND (recurrence_end IS NULL OR recurrence_end >= %s)""",
+                        (series_until, self._series_loaded_until)
+                    )
+                    series = [(row, self._series_loaded_until) for row in await cursor.fetchall()]
+                    await cursor.execute(
+                        "DELETE FROM calendar_reminders_sent WHERE remind_at < %s",
+                        (datetime.now() - timedelta(days=REMINDER_RETENTION_DAYS),)
+                    )
+                if self._last_scan is not None:
+                    await cursor.execute(
+                        """SELECT id, user_id, title, event_date, start_time, notify_before, recurrence
+                           FROM calendar_events
+                           WHERE updated_at >= %s AND recurrence IS NOT NULL AND event_date < %s""",
+                        (self._last_scan, series_until)
+                    )
+                    series += [(row, date.today()) for row in await cursor.fetchall()]
+            await conn.commit()
+
+        for row in rows:
+            self._schedule(row, row["event_date"], row["remind_at"])
+        for row, since in series:
+            rule = RecurrenceRule(**row["recurrence"])
+            for day in occurrences(rule, row["event_date"], since, series_until):
+                remind_at = datetime.combine(day, row["start_time"]) - timedelta(minutes=row["notify_before"] or 0)
+                if remind_at >= datetime.now() - timedelta(seconds=REMINDER_GRACE_SECONDS):
+                    self._schedule(row, day, remind_at)
+
+        self._loaded_until = max(self._loaded_until, horizon)
+        self._series_loaded_until = max(self._series_loaded_until, series_until)
+        self._last_scan = scan_started
+
+    def _schedule(self, row: dict, event_date: date, remind_at: datetime) -> None:
+        key = (str(row["id"]), remind_at)
+        if key in self._scheduled:
+            return
+        self._scheduled.add(key)
+        reminder = {
+            "event_id": str(row["id"]),
+            "user_id": str(row["user_id"]),
+            "title": row["title"],
+            "event_date": event_date.isoformat(),
+            "start_time": row["start_time"].isoformat(),
+            "remind_at": remind_at.isoformat(),
+        }
+        self.wheel.add(int(remind_at.timestamp()), reminder)
+
+    async def _fire(self, due: List[dict]) -> None:
+        """Claim due reminders in one statement and dispatch the ones won.
+
+        The claim also re-checks the event, dropping wheel entries for events
+        deleted or rescheduled after they were loaded. A series occurrence is
+        recomputed from the current row first, so one exdated, cut off by a
+        shorter series or moved by an edit is not sent at its old time.
+        """
+        for reminder in due:
+            self._scheduled.discard((reminder["event_id"], datetime.fromisoformat(reminder["remind_at"])))
+
+        async with get_pool().connection() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(
+                    """SELECT id, event_date, start_time, notify_before, recurrence FROM calendar_events
+                       WHERE id = ANY(%s::uuid[]) AND recurrence IS NOT NULL""",
+                    ([r["event_id"] for r in due],)
+                )
+                series = {str(row["id"]): row for row in await cursor.fetchall()}
+                due = [r for r in due if r["event_id"] not in series or _occurrence_due(series[r["event_id"]], r)]
+                if not due:
+                    return
+
+                await cursor.execute(
+                    """INSERT INTO calendar_reminders_sent (event_id, remind_at)
+                       SELECT e.id, v.remind_at
+                       FROM unnest(%s::uuid[], %s::timestamp[]) AS v(id, remind_at)
+                       JOIN calendar_events e ON e.id = v.id
+                       AND (e.recurrence IS NOT NULL OR e.remind_at = v.remind_at)
+                       ON CONFLICT DO NOTHING
+                       RETURNING event_id, remind_at""",
+                    (
+                        [r["event_id"] for r in due],
+                        [datetime.fromisoformat(r["remind_at"]) for r in due]
+                    )
+                )
+                claimed = {(str(row["event_id"]), row["remind_at"]) for row in await cursor.fetchall()}
+            await conn.commit()
+
+        for reminder in due:
+            if (reminder["event_id"], datetime.fromisoformat(reminder["remind_at"])) not in claimed:
+                continue
+            for sink in self.sinks:
+                try:
+                    await sink.send(reminder)
+                except Exception as e:
+                    print(f"Reminder sink {type(sink).__name__} failed: {e}")
+
+def _occurrence_due(row: dict, reminder: dict) -> bool:
+    """Whether a series still has the reminder's occurrence, due at the reminder's time."""
+    day = date.fromisoformat(reminder["event_date"])
+    rule = RecurrenceRule(**row["recurrence"])
+    if next(occurrences(rule, row["event_date"], day, day + timedelta(days=1)), None) != day:
+        return False
+    if row["start_time"].isoformat() != reminder["start_time"]:
+        return False
+    remind_at = datetime.combine(day, row["start_time"]) - timedelta(minutes=row["notify_before"] or 0)
+    return remind_at == datetime.fromisoformat(reminder["remind_at"])
+
+def _make_sinks() -> List[ReminderSink]:
+    sinks: List[ReminderSink] = []
+    for name in (n.strip() for n in REMINDER_SINKS.split(",")):
+        if name == "log":
+            sinks.append(LogSink())
+        elif name == "webhook" and REMINDER_WEBHOOK_URL:
+            sinks.append(WebhookSink(REMINDER_WEBHOOK_URL))
+        elif name == "websocket":
+            sinks.append(websocket_sink)
+    return sinks
+
+reminder_scheduler = ReminderScheduler(_make_sinks())
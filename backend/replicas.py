@@ -0,0 +1,194 @@
+import asyncio
+import itertools
+import time
+from typing import AsyncIterator, List, Optional
+import psycopg
+from fastapi import Depends
+from psycopg.conninfo import conninfo_to_dict
+from psycopg_pool import AsyncConnectionPool, PoolTimeout
+from auth import get_current_user
+from database import connection_kwargs, get_pool
+from cache import CacheBackend, MemoryCache, event_cache
+from metrics import Counter, GaugeCallback, add_span, db_pool_wait, register
+from config import (
+    DATABASE_REPLICA_URLS, REPLICA_MAX_LAG_SECONDS, REPLICA_STICKY_SECONDS,
+    REPLICA_CHECK_INTERVAL_SECONDS, REPLICA_CONNECT_TIMEOUT, CACHE_BACKEND, WEB_CONCURRENCY,
+    DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, DB_POOL_MAX_IDLE, DB_POOL_MAX_LIFETIME
+)
+
+# Replay lag in seconds. 0 when the standby is streaming and has replayed
+# everything it received (an idle primary would otherwise look like growing
+# lag), or is not a standby at all. A standby whose WAL receiver is not
+# streaming has received nothing new since it stopped, so equal LSNs prove
+# nothing; its lag is the time since its last replayed commit.
+LAG_QUERY = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN EXISTS (SELECT 1 FROM pg_stat_wal_receiver WHERE status = 'streaming')
+             AND pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END AS lag
+"""
+
+read_routes = register(Counter(
+    "db_read_routes_total", "Reads sent to a replica or kept on the primary, and why", ("target", "reason")
+))
+
+class Replica:
+    """One read replica: its pool plus the lag and health seen by the last check."""
+
+    def __init__(self, conninfo: str):
+        params = conninfo_to_dict(conninfo)
+        self.name = f"{params.get('host', 'localhost')}:{params.get('port', '5432')}"
+        self.lag: Optional[float] = None
+        self.healthy = False
+        # Autocommit: reads need no transaction, and a connection handed back
+        # after a failed query is not left idle in one
+        self.pool = AsyncConnectionPool(
+            conninfo=conninfo,
+            kwargs={**connection_kwargs(), "autocommit": True},
+            min_size=DB_POOL_MIN_SIZE,
+            max_size=DB_POOL_MAX_SIZE,
+            timeout=REPLICA_CONNECT_TIMEOUT,
+            max_idle=DB_POOL_MAX_IDLE,
+            max_lifetime=DB_POOL_MAX_LIFETIME,
+            check=AsyncConnectionPool.check_connection,
+            open=False
+        )
+
+    def mark_down(self) -> None:
+        self.healthy = False
+
+class ReplicaRouter:
+    """Routes reads to replicas that are caught up, and everything else to the primary.
+
+    Each replica's replay lag is polled every REPLICA_CHECK_INTERVAL_SECONDS; one
+    over REPLICA_MAX_LAG_SECONDS, or unreachable, gets no reads until a later
+    check passes. After a write the user's reads stay on the primary for
+    REPLICA_STICKY_SECONDS so they see their own change. The marker lives in the
+    cache backend, so several workers need CACHE_BACKEND=redis; open() refuses
+    to start replicas without it.
+    """
+
+    def __init__(self, conninfos: List[str], sticky: CacheBackend):
+        self.replicas = [Replica(c) for c in conninfos]
+        self.sticky = sticky
+        self._next = itertools.count()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    async def open(self) -> None:
+        if not self.enabled:
+            return
+        if WEB_CONCURRENCY > 1 and CACHE_BACKEND != "redis":
+            # A marker set in one worker's memory is not seen by the others,
+            # whose next read of the user could hit a replica without the write
+            raise RuntimeError("DATABASE_REPLICA_URLS with several workers requires CACHE_BACKEND=redis")
+        for replica in self.replicas:
+            # Do not wait for connections: a replica that is down must not block startup
+            await replica.pool.open(wait=False)
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for replica in self.replicas:
+            await replica.pool.close()
+
+    async def mark_write(self, user_id: str) -> None:
+        """Keep the user's reads on the primary for the stickiness window."""
+        if self.enabled:
+            await self.sticky.set(self._key(user_id), "1", REPLICA_STICKY_SECONDS)
+
+    async def choose(self, user_id: str) -> Optional[Replica]:
+        """A healthy replica for this user's read, or None to use the primary."""
+        if not self.enabled:
+            return None
+        if await self.sticky.get(self._key(user_id)) is not None:
+            read_routes.inc("primary", "sticky")
+            return None
+        healthy = [r for r in self.replicas if r.healthy]
+        if not healthy:
+            read_routes.inc("primary", "unavailable")
+            return None
+        return healthy[next(self._next) % len(healthy)]
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.gather(*(self._check(r) for r in self.replicas))
+            await asyncio.sleep(REPLICA_CHECK_INTERVAL_SECONDS)
+
+    async def _check(self, replica: Replica) -> None:
+        try:
+            async with replica.pool.connection() as conn:
+                cursor = await conn.execute(LAG_QUERY)
+                lag = (await cursor.fetchone())["lag"]
+            replica.lag = float(lag) if lag is not None else None
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if replica.healthy:
+                print(f"Replica {replica.name} unreachable: {e}")
+            replica.lag = None
+        healthy = replica.lag is not None and replica.lag <= REPLICA_MAX_LAG_SECONDS
+        if replica.healthy and not healthy and replica.lag is not None:
+            print(f"Replica {replica.name} lagging by {replica.lag:.1f}s; reading from primary")
+        replica.healthy = healthy
+
+    @staticmethod
+    def _key(user_id: str) -> str:
+        return f"replica-sticky:{user_id}"
+
+def _replica_lag() -> dict:
+    return {(r.name,): r.lag for r in replica_router.replicas if r.lag is not None}
+
+def _make_sticky_backend() -> CacheBackend:
+    # Share the Redis cache across workers; otherwise a dedicated map, so the
+    # markers are not evicted by cached views
+    return event_cache.backend if CACHE_BACKEND == "redis" else MemoryCache()
+
+replica_router = ReplicaRouter(
+    [c.strip() for c in DATABASE_REPLICA_URLS.split(",") if c.strip()], _make_sticky_backend()
+)
+
+register(GaugeCallback("db_replica_lag_seconds", "Replay lag at the last check", ("replica",), _replica_lag))
+
+async def get_read_db(user_id: str = Depends(get_current_user)) -> AsyncIterator[psycopg.AsyncConnection]:
+    """FastAPI dependency lending a replica connection, or a primary one as fallback.
+
+    Only failures to get a connection fall back; a replica that drops
+    mid-query fails that request and is taken out of rotation.
+    """
+    replica = await replica_router.choose(user_id)
+    started = time.perf_counter()
+    if replica is not None:
+        try:
+            conn = await replica.pool.getconn()
+        except (PoolTimeout, psycopg.OperationalError) as e:
+            print(f"Replica {replica.name} unavailable, reading from primary: {e}")
+            replica.mark_down()
+            read_routes.inc("primary", "unavailable")
+        else:
+            read_routes.inc("replica", "healthy")
+            add_span("pool", "replica_wait", time.perf_counter() - started)
+            try:
+                yield conn
+            finally:
+                if conn.broken:
+                    replica.mark_down()
+                await replica.pool.putconn(conn)
+            return
+
+    async with get_pool().connection() as conn:
+        waited = time.perf_counter() - started
+        db_pool_wait.observe(waited)
+        add_span("pool", "wait", waited)
+        yield conn
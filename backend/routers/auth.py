@@ -1,15 +1,23 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Request, status, Depends
 from datetime import timedelta
+from psycopg import AsyncConnection
+from psycopg.errors import UniqueViolation
 from models import UserCreate, UserLogin, UserResponse, Token
-from auth import get_password_hash, verify_password, create_access_token
-from database import get_db_connection
+from auth import get_password_hash_async, verify_password_async, needs_rehash, create_access_token
+from ratelimit import limit_login, limit_register
+from database import get_db, get_pool
 from config import ACCESS_TOKEN_EXPIRE_MINUTES
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
+# register and login borrow a pooled connection only around their queries, never
+# while bcrypt runs, so a burst of logins cannot starve the rest of the API
+
 @router.post("/register", response_model=UserResponse)
-async def register(user: UserCreate):
+async def register(user: UserCreate, request: Request):
     """Register a new user."""
+    await limit_register(request)
+
     # Validate password length (bcrypt has 72 byte limit)
     if len(user.password) > 72:
         raise HTTPException(
@@ -24,31 +32,30 @@ async def register(user: UserCreate):
         )
     
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Check if user already exists
-        cursor.execute("SELECT id FROM calendar_users WHERE email = %s", (user.email,))
-        existing_user = cursor.fetchone()
-        
+        # Check if user already exists, before spending a hash on it
+        async with get_pool().connection() as conn:
+            cursor = await conn.execute("SELECT id FROM calendar_users WHERE email = %s", (user.email,))
+            existing_user = await cursor.fetchone()
         if existing_user:
-            cursor.close()
-            conn.close()
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email already registered"
             )
-        
-        # Create new user
-        password_hash = get_password_hash(user.password)
-        cursor.execute(
-            "INSERT INTO calendar_users (email, password_hash) VALUES (%s, %s) RETURNING id, email",
-            (user.email, password_hash)
-        )
-        new_user = cursor.fetchone()
-        conn.commit()
-        cursor.close()
-        conn.close()
+
+        # Create new user; a concurrent registration of the same email hits the unique constraint
+        password_hash = await get_password_hash_async(user.password)
+        try:
+            async with get_pool().connection() as conn:
+                cursor = await conn.execute(
+                    "INSERT INTO calendar_users (email, password_hash) VALUES (%s, %s) RETURNING id, email",
+                    (user.email, password_hash)
+                )
+                new_user = await cursor.fetchone()
+        except UniqueViolation:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Email already registered"
+            )
         
         return UserResponse(id=new_user["id"], email=new_user["email"])
     
@@ -62,27 +69,39 @@ async def register(user: UserCreate):
         )
 
 @router.post("/login", response_model=Token)
-async def login(user: UserLogin):
+async def login(user: UserLogin, request: Request):
     """Login and get access token."""
+    await limit_login(request, user.email)
+
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute(
-            "SELECT id, email, password_hash FROM calendar_users WHERE email = %s",
-            (user.email,)
-        )
-        db_user = cursor.fetchone()
-        cursor.close()
-        conn.close()
+        async with get_pool().connection() as conn:
+            cursor = await conn.execute(
+                "SELECT id, email, password_hash FROM calendar_users WHERE email = %s",
+                (user.email,)
+            )
+            db_user = await cursor.fetchone()
         
-        if not db_user or not verify_password(user.password, db_user["password_hash"]):
+        if not db_user or not await verify_password_async(user.password, db_user["password_hash"]):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect email or password",
                 headers={"WWW-Authenticate": "Bearer"},
             )
-        
+
+        # Upgrade hashes made with an older work factor while the password is at hand;
+        # when the hash workers are saturated, leave it for a later login
+        if needs_rehash(db_user["password_hash"]):
+            try:
+                new_hash = await get_password_hash_async(user.password)
+            except HTTPException:
+                new_hash = None
+            if new_hash is not None:
+                async with get_pool().connection() as conn:
+                    await conn.execute(
+                        "UPDATE calendar_users SET password_hash = %s WHERE id = %s",
+                        (new_hash, db_user["id"])
+                    )
+
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
         access_token = create_access_token(
             data={"sub": str(db_user["id"])},
@@ -101,16 +120,12 @@ async def login(user: UserLogin):
         )
 
 @router.get("/me", response_model=UserResponse)
-async def get_me(user_id: str):
+async def get_me(user_id: str, conn: AsyncConnection = Depends(get_db)):
     """Get current user info."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT id, email FROM calendar_users WHERE id = %s", (user_id,))
-        user = cursor.fetchone()
-        cursor.close()
-        conn.close()
+        async with conn.cursor() as cursor:
+            await cursor.execute("SELECT id, email FROM calendar_users WHERE id = %s", (user_id,))
+            user = await cursor.fetchone()
         
         if not user:
             raise HTTPException(
@@ -0,0 +1,144 @@
+from fastapi import APIRouter, HTTPException, status, Depends
+from datetime import datetime, timedelta
+from typing import List
+from uuid import UUID
+from psycopg import AsyncConnection
+from psycopg.errors import ForeignKeyViolation
+from models import AvailabilityRequest, AvailabilityResponse, TimeSlot
+from auth import get_current_user
+from database import get_db
+from freebusy import load_busy, find_slots
+from config import FREEBUSY_MAX_DAYS
+
+router = APIRouter(prefix="/availability", tags=["Availability"])
+
+@router.post("/slots", response_model=AvailabilityResponse)
+async def get_available_slots(
+    request: AvailabilityRequest,
+    user_id: str = Depends(get_current_user),
+    conn: AsyncConnection = Depends(get_db)
+):
+    """Find bookable slots inside working hours.
+
+    Several user_ids give the slots where all of them are free, for group
+    meetings. Only times are returned, never event details. Every other user
+    must have shared their availability with the caller, or the request is
+    refused with 403.
+    """
+    if request.end_date <= request.start_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="end_date must be after start_date"
+        )
+    if (request.end_date - request.start_date).days > FREEBUSY_MAX_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Availability window may span at most {FREEBUSY_MAX_DAYS} days"
+        )
+    if request.work_end <= request.work_start:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="work_end must be after work_start"
+        )
+
+    try:
+        user_ids = [str(u) for u in request.user_ids] or [user_id]
+        await _ensure_shared(conn, user_id, user_ids)
+        window_start = datetime.combine(request.start_date, request.work_start)
+        window_end = datetime.combine(request.end_date, request.work_start)
+        buffer_before = timedelta(minutes=request.buffer_before)
+        buffer_after = timedelta(minutes=request.buffer_after)
+
+        # Widen the fetch so buffers at the window edges see neighbouring events
+        index = await load_busy(conn, user_ids, window_start - buffer_before, window_end + buffer_after)
+
+        days = [
+            request.start_date + timedelta(days=n)
+            for n in range((request.end_date - request.start_date).days)
+        ]
+        slots = find_slots(
+            index.busy,
+            [d for d in days if d.weekday() in request.working_days],
+            request.work_start,
+            request.work_end,
+            slot_length=timedelta(minutes=request.slot_minutes),
+            step=timedelta(minutes=request.step_minutes or request.slot_minutes),
+            buffer_before=buffer_before,
+            buffer_after=buffer_after,
+            not_before=datetime.now()
+        )
+        return AvailabilityResponse(slots=[TimeSlot(start=s, end=e) for s, e in slots])
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error finding available slots: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/shares", response_model=List[UUID])
+async def list_shares(user_id: str = Depends(get_current_user), conn: AsyncConnection = Depends(get_db)):
+    """Users the caller has shared their availability with."""
+    try:
+        async with conn.cursor() as cursor:
+            await cursor.execute(
+                "SELECT viewer_id FROM calendar_availability_shares WHERE owner_id = %s ORDER BY created_at",
+                (user_id,)
+            )
+            return [row["viewer_id"] for row in await cursor.fetchall()]
+    except Exception as e:
+        print(f"Error listing availability shares: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.put("/shares/{viewer_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def share_availability(viewer_id: UUID, user_id: str = Depends(get_current_user), conn: AsyncConnection = Depends(get_db)):
+    """Let another user include the caller in /availability/slots queries."""
+    try:
+        async with conn.cursor() as cursor:
+            await cursor.execute(
+                """INSERT INTO calendar_availability_shares (owner_id, viewer_id) VALUES (%s, %s)
+                   ON CONFLICT DO NOTHING""",
+                (user_id, viewer_id)
+            )
+        await conn.commit()
+        return None
+    except ForeignKeyViolation:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    except Exception as e:
+        print(f"Error sharing availability: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.delete("/shares/{viewer_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def unshare_availability(viewer_id: UUID, user_id: str = Depends(get_current_user), conn: AsyncConnection = Depends(get_db)):
+    """Stop sharing the caller's availability with a user."""
+    try:
+        async with conn.cursor() as cursor:
+            await cursor.execute(
+                "DELETE FROM calendar_availability_shares WHERE owner_id = %s AND viewer_id = %s",
+                (user_id, viewer_id)
+            )
+        await conn.commit()
+        return None
+    except Exception as e:
+        print(f"Error unsharing availability: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def _ensure_shared(conn: AsyncConnection, user_id: str, user_ids: List[str]) -> None:
+    """Raise 403 unless every other user in user_ids shares their availability with user_id."""
+    others = set(user_ids) - {user_id}
+    if not others:
+        return
+    async with conn.cursor() as cursor:
+        await cursor.execute(
+            """SELECT owner_id FROM calendar_availability_shares
+               WHERE viewer_id = %s AND owner_id = ANY(%s::uuid[])""",
+            (user_id, list(others))
+        )
+        shared = {str(row["owner_id"]) for row in await cursor.fetchall()}
+    if others - shared:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail={"message": "These users have not shared their availability with you",
+                    "user_ids": sorted(others - shared)}
+        )
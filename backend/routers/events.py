@@ -1,151 +1,658 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from typing import List, Optional
-from datetime import date, datetime
-from models import EventCreate, EventUpdate, EventResponse
-from auth import get_current_user
-from database import get_db_connection
+import asyncio
+import base64
+import hashlib
+import heapq
+import json
+import re
+from itertools import islice
+from fastapi import APIRouter, HTTPException, status, Depends, Header, Path, Query, Response
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, Iterable, Iterator, List, Literal, Optional, Tuple
+from datetime import date, datetime, time, timedelta, timezone
+from uuid import UUID
+from psycopg import AsyncConnection
+from psycopg.types.json import Jsonb
+from models import (
+    EventCreate, EventUpdate, EventResponse, RecurrenceRule,
+    EventBulkCreate, EventBulkUpdate, EventBulkDelete, EventBulkResult,
+    TimeSlot, SlotAvailability, FreeBusyRequest, FreeBusyResponse, EventSyncResponse, DaySummary
+)
+from auth import get_current_user, decode_token
+from database import get_db, get_pool, get_conninfo, connection_kwargs
+from replicas import get_read_db, replica_router
+from cache import event_cache, today_view, upcoming_view, month_view
+from recurrence import occurrences, last_occurrence
+from freebusy import load_busy, event_interval
+from changes import change_hub
+from serialization import FastJSONResponse, event_record, dumps
+from config import (
+    EVENTS_PAGE_SIZE, EVENTS_MAX_PAGE_SIZE, FREEBUSY_MAX_DAYS, SUMMARY_MAX_DAYS,
+    EXPORT_MAX_CONCURRENT, EXPORT_IDLE_TIMEOUT_SECONDS
+)
 
 router = APIRouter(prefix="/events", tags=["Events"])
 
+EVENT_COLUMNS = """id, user_id, title, description, event_date, start_time, end_time,
+                   notify_before, created_at, updated_at, recurrence"""
+
+# Event ETags are updated_at as integer microseconds since this epoch
+_ETAG_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+UPCOMING_LIMIT = 20
+
+# Read paths that must stay on their indexes; tests/test_query_plans.py EXPLAINs these strings.
+# Half-open date ranges so (user_id, event_date, start_time) bounds both ends.
+WINDOW_QUERY = f"""SELECT {EVENT_COLUMNS}
+    FROM calendar_events WHERE user_id = %s
+    AND event_date >= %s AND event_date < %s AND recurrence IS NULL
+    ORDER BY event_date, start_time"""
+UPCOMING_QUERY = f"""SELECT {EVENT_COLUMNS}
+    FROM calendar_events WHERE user_id = %s AND event_date >= %s AND recurrence IS NULL
+    ORDER BY event_date, start_time LIMIT %s"""
+# Series that can have occurrences on or after a date, optionally starting before another
+SERIES_QUERY = f"""SELECT {EVENT_COLUMNS}
+    FROM calendar_events WHERE user_id = %s AND recurrence IS NOT NULL
+    AND (recurrence_end IS NULL OR recurrence_end >= %s)"""
+SERIES_WINDOW_QUERY = SERIES_QUERY + " AND event_date < %s"
+
+# Seconds between SSE comments that keep idle proxies from closing the stream
+STREAM_KEEPALIVE_SECONDS = 15
+
+# Keyset bounds for sync tokens: before every id (initial sync) and after every id (caught up)
+_MIN_UUID = "00000000-0000-0000-0000-000000000000"
+_MAX_UUID = "ffffffff-ffff-ffff-ffff-ffffffffffff"
+
+# Words in a search query; everything else (tsquery operators included) is dropped
+_SEARCH_TERM = re.compile(r"\w+")
+
+# Rows pulled per round trip by the export's server-side cursor
+EXPORT_FETCH_SIZE = 1000
+
+# Exports each hold a database connection for as long as the client reads; more wait here
+_export_slots = asyncio.Semaphore(EXPORT_MAX_CONCURRENT)
+
 @router.get("", response_model=List[EventResponse])
-async def get_all_events(user_id: str = Depends(get_current_user)):
-    """Get all events for the current user."""
+async def get_all_events(
+    response: Response,
+    limit: int = Query(EVENTS_PAGE_SIZE, ge=1, le=EVENTS_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    user_id: str = Depends(get_current_user),
+    conn: AsyncConnection = Depends(get_read_db)
+):
+    """Get all events for the current user, one page at a time.
+
+    Series are expanded into their occurrences, so an open-ended one fills
+    every later page. The next page's cursor is returned in the
+    X-Next-Cursor header.
+    """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute(
-            """SELECT id, user_id, title, description, event_date, start_time, end_time, 
-               notify_before, created_at, updated_at 
-               FROM calendar_events WHERE user_id = %s ORDER BY event_date, start_time""",
-            (user_id,)
-        )
-        events = cursor.fetchall()
-        cursor.close()
-        conn.close()
-        
-        return [_format_event(e) for e in events]
+        not_modified, _ = await _check_not_modified(conn, response, user_id, f"all:{limit}:{cursor}", if_none_match)
+        if not_modified:
+            return not_modified
+
+        events = await _fetch_page(conn, response, user_id, None, None, limit, cursor)
+        return _event_list(response, events)
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error fetching events: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/range", response_model=List[EventResponse])
+async def get_events_in_range(
+    response: Response,
+    start: date,
+    end: date,
+    limit: int = Query(EVENTS_PAGE_SIZE, ge=1, le=EVENTS_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    user_id: str = Depends(get_current_user),
+    conn: AsyncConnection = Depends(get_db)
+):
+    """Get events and series occurrences with start <= event_date < end, one page at a time."""
+    if end <= start:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="end must be after start"
+        )
+
+    try:
+        not_modified, _ = await _check_not_modified(
+            conn, response, user_id, f"range:{start}:{end}:{limit}:{cursor}", if_none_match
+        )
+        if not_modified:
+            return not_modified
+
+        events = await _fetch_page(conn, response, user_id, start, end, limit, cursor)
+        return _event_list(response, events)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error fetching events in range: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/export")
+async def export_events(
+    format: Literal["ndjson", "json"] = "ndjson",
+    user_id: str = Depends(get_current_user)
+):
+    """Stream every event for the current user as NDJSON or a JSON array.
+
+    Rows are read through a server-side cursor and written out batch by batch,
+    so memory stays constant and a slow client slows the cursor down.
+    """
+    if format == "json":
+        return StreamingResponse(_export_json(user_id), media_type="application/json")
+    return StreamingResponse(_export_ndjson(user_id), media_type="application/x-ndjson")
+
+@router.get("/stream")
+async def stream_changes(token: str):
+    """Push the current user's event changes as Server-Sent Events.
+
+    Each message is a create/update/delete delta ("event" is omitted when the
+    row was too large to embed; fetch it by id) or "resync" when the client
+    must refetch. EventSource cannot send headers, so the JWT is passed as the
+    token query parameter.
+    """
+    user_id = decode_token(token)
+    if user_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials"
+        )
+    return StreamingResponse(
+        _stream_changes(user_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/sync", response_model=EventSyncResponse)
+async def sync_events(
+    token: Optional[str] = None,
+    limit: int = Query(EVENTS_PAGE_SIZE, ge=1, le=EVENTS_MAX_PAGE_SIZE),
+    user_id: str = Depends(get_current_user),
+    conn: AsyncConnection = Depends(get_db)
+):
+    """Return events created, updated or deleted since a sync token.
+
+    Omit the token for the initial full sync, then keep calling with
+    next_token while has_more is true. Series are returned as stored, not
+    expanded. A token older than the tombstone retention window gets
+    410 Gone and the client must sync again without one.
+    """
+    try:
+        after_seq, after_id = _decode_sync_token(token) if token else (-1, _MIN_UUID)
+        async with conn.cursor() as cursor:
+            # Read the counter first: anything committed after it has a larger sequence number
+            await cursor.execute(
+                "SELECT version, compacted_seq FROM calendar_event_versions WHERE user_id = %s",
+                (user_id,)
+            )
+            row = await cursor.fetchone()
+            current, compacted = (row["version"], row["compacted_seq"]) if row else (0, 0)
+            if token and after_seq < compacted:
+                raise HTTPException(
+                    status_code=status.HTTP_410_GONE,
+                    detail="Sync token expired; sync again without a token"
+                )
+
+            await cursor.execute(
+                f"""SELECT {EVENT_COLUMNS}, change_seq FROM calendar_events
+                   WHERE user_id = %s AND (change_seq, id) > (%s, %s) AND change_seq <= %s
+                   ORDER BY change_seq, id LIMIT %s""",
+                (user_id, after_seq, after_id, current, limit + 1)
+            )
+            events = await cursor.fetchall()
+            tombstones = []
+            if token:
+                await cursor.execute(
+                    """SELECT id, change_seq FROM calendar_event_tombstones
+                       WHERE user_id = %s AND (change_seq, id) > (%s, %s) AND change_seq <= %s
+                       ORDER BY change_seq, id LIMIT %s""",
+                    (user_id, after_seq, after_id, current, limit + 1)
+                )
+                tombstones = await cursor.fetchall()
+
+        # Each list holds its first limit + 1 changes, so the merged head is exact
+        changes = list(heapq.merge(
+            ((e, False) for e in events), ((t, True) for t in tombstones),
+            key=lambda change: (change[0]["change_seq"], change[0]["id"])
+        ))
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+        if has_more:
+            last = changes[-1][0]
+            next_token = _encode_sync_token(last["change_seq"], str(last["id"]))
+        else:
+            next_token = _encode_sync_token(current, _MAX_UUID)
+
+        return EventSyncResponse(
+            events=[_format_event(row) for row, is_tombstone in changes if not is_tombstone],
+            deleted=[row["id"] for row, is_tombstone in changes if is_tombstone],
+            next_token=next_token,
+            has_more=has_more
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error syncing events: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/search", response_model=List[EventResponse])
+async def search_events(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    limit: int = Query(EVENTS_PAGE_SIZE, ge=1, le=EVENTS_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    user_id: str = Depends(get_current_user),
+    conn: AsyncConnection = Depends(get_db)
+):
+    """Search event titles and descriptions, best matches first.
+
+    Every word must match, and each may be a prefix ("dent" finds "dentist").
+    start/end restrict results to start <= event_date < end; a series matches
+    when any of its dates can fall in that range. The next page's cursor is
+    returned in the X-Next-Cursor header.
+    """
+    terms = _SEARCH_TERM.findall(q)
+    if not terms:
+        return _event_list(response, [])
+
+    try:
+        where = "user_id = %s AND search_vector @@ query"
+        params: list = [" & ".join(f"{term}:*" for term in terms), user_id]
+        if start is not None:
+            where += " AND (CASE WHEN recurrence IS NULL THEN event_date ELSE coalesce(recurrence_end, 'infinity') END) >= %s"
+            params.append(start)
+        if end is not None:
+            where += " AND event_date < %s"
+            params.append(end)
+        after = ""
+        if cursor:
+            after = "WHERE (rank, id) < (%s::real, %s)"
+            params.extend(_decode_search_cursor(cursor))
+        params.append(limit + 1)
+
+        async with conn.cursor() as cur:
+            await cur.execute(
+                f"""SELECT * FROM (
+                        SELECT {EVENT_COLUMNS}, ts_rank_cd(search_vector, query) AS rank
+                        FROM calendar_events, to_tsquery('english', %s) AS query
+                        WHERE {where}
+                    ) hits {after}
+                    ORDER BY rank DESC, id DESC LIMIT %s""",
+                params
+            )
+            events = await cur.fetchall()
+
+        if len(events) > limit:
+            events = events[:limit]
+            response.headers["X-Next-Cursor"] = _encode_search_cursor(events[-1])
+        return _event_list(response, events)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error searching events: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/date/{event_date}", response_model=List[EventResponse])
-async def get_events_by_date(event_date: date, user_id: str = Depends(get_current_user)):
+async def get_events_by_date(
+    event_date: date,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    user_id: str = Depends(get_current_user),
+    conn: AsyncConnection = Depends(get_read_db)
+):
     """Get events for a specific date."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute(
-            """SELECT id, user_id, title, description, event_date, start_time, end_time,
-               notify_before, created_at, updated_at 
-               FROM calendar_events WHERE user_id = %s AND event_date = %s ORDER BY start_time""",
-            (user_id, event_date)
-        )
-        events = cursor.fetchall()
-        cursor.close()
-        conn.close()
-        
-        return [_format_event(e) for e in events]
+        not_modified, _ = await _check_not_modified(conn, response, user_id, f"date:{event_date}", if_none_match)
+        if not_modified:
+            return not_modified
+
+        events = await _fetch_window(conn, user_id, event_date, event_date + timedelta(days=1))
+        return _event_list(response, events)
     except Exception as e:
         print(f"Error fetching events by date: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/upcoming", response_model=List[EventResponse])
-async def get_upcoming_events(user_id: str = Depends(get_current_user)):
+async def get_upcoming_events(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    user_id: str = Depends(get_current_user),
+    conn: AsyncConnection = Depends(get_read_db)
+):
     """Get upcoming events (today and future)."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
         today = date.today()
-        cursor.execute(
-            """SELECT id, user_id, title, description, event_date, start_time, end_time,
-               notify_before, created_at, updated_at 
-               FROM calendar_events WHERE user_id = %s AND event_date >= %s 
-               ORDER BY event_date, start_time LIMIT 20""",
-            (user_id, today)
-        )
-        events = cursor.fetchall()
-        cursor.close()
-        conn.close()
-        
-        return [_format_event(e) for e in events]
+        view = upcoming_view(today)
+        not_modified, version = await _check_not_modified(conn, response, user_id, view, if_none_match)
+        if not_modified:
+            return not_modified
+
+        cached = await event_cache.get(user_id, view, version)
+        if cached is not None:
+            return FastJSONResponse(raw=cached.encode("utf-8"), headers=_carried_headers(response))
+
+        async with conn.cursor() as cursor:
+            await cursor.execute(UPCOMING_QUERY, (user_id, today, UPCOMING_LIMIT))
+            singles = await cursor.fetchall()
+        series = await _fetch_series(conn, user_id, today, None)
+
+        # Each series is an endless generator; merge lazily and stop at the limit
+        streams = [singles] + [_series_occurrences(row, today, None) for row in series]
+        events = list(islice(heapq.merge(*streams, key=_display_order), UPCOMING_LIMIT))
+
+        result = [event_record(e) for e in events]
+        await event_cache.set(user_id, view, version, result)
+        return FastJSONResponse(result, headers=_carried_headers(response))
     except Exception as e:
         print(f"Error fetching upcoming events: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/today", response_model=List[EventResponse])
-async def get_todays_events(user_id: str = Depends(get_current_user)):
+async def get_todays_events(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    user_id: str = Depends(get_current_user),
+    conn: AsyncConnection = Depends(get_read_db)
+):
     """Get today's events."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
         today = date.today()
-        cursor.execute(
-            """SELECT id, user_id, title, description, event_date, start_time, end_time,
-               notify_before, created_at, updated_at 
-               FROM calendar_events WHERE user_id = %s AND event_date = %s ORDER BY start_time""",
-            (user_id, today)
-        )
-        events = cursor.fetchall()
-        cursor.close()
-        conn.close()
-        
-        return [_format_event(e) for e in events]
+        view = today_view(today)
+        not_modified, version = await _check_not_modified(conn, response, user_id, view, if_none_match)
+        if not_modified:
+            return not_modified
+
+        cached = await event_cache.get(user_id, view, version)
+        if cached is not None:
+            return FastJSONResponse(raw=cached.encode("utf-8"), headers=_carried_headers(response))
+
+        events = await _fetch_window(conn, user_id, today, today + timedelta(days=1))
+
+        result = [event_record(e) for e in events]
+        await event_cache.set(user_id, view, version, result)
+        return FastJSONResponse(result, headers=_carried_headers(response))
     except Exception as e:
         print(f"Error fetching today's events: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/month/{year}/{month}", response_model=List[EventResponse])
-async def get_events_by_month(year: int, month: int, user_id: str = Depends(get_current_user)):
+async def get_events_by_month(
+    response: Response,
+    year: int = Path(..., ge=1, lt=9999),
+    month: int = Path(..., ge=1, le=12),
+    if_none_match: Optional[str] = Header(None),
+    user_id: str = Depends(get_current_user),
+    conn: AsyncConnection = Depends(get_read_db)
+):
     """Get events for a specific month."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute(
-            """SELECT id, user_id, title, description, event_date, start_time, end_time,
-               notify_before, created_at, updated_at 
-               FROM calendar_events WHERE user_id = %s 
-               AND EXTRACT(YEAR FROM event_date) = %s 
-               AND EXTRACT(MONTH FROM event_date) = %s
-               ORDER BY event_date, start_time""",
-            (user_id, year, month)
-        )
-        events = cursor.fetchall()
-        cursor.close()
-        conn.close()
-        
-        return [_format_event(e) for e in events]
+        view = month_view(year, month)
+        not_modified, version = await _check_not_modified(conn, response, user_id, view, if_none_match)
+        if not_modified:
+            return not_modified
+
+        cached = await event_cache.get(user_id, view, version)
+        if cached is not None:
+            return FastJSONResponse(raw=cached.encode("utf-8"), headers=_carried_headers(response))
+
+        start, end = _month_bounds(year, month)
+        events = await _fetch_window(conn, user_id, start, end)
+
+        result = [event_record(e) for e in events]
+        await event_cache.set(user_id, view, version, result)
+        return FastJSONResponse(result, headers=_carried_headers(response))
     except Exception as e:
         print(f"Error fetching events by month: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/summary", response_model=List[DaySummary])
+async def get_event_summary(
+    response: Response,
+    start: date,
+    end: date,
+    if_none_match: Optional[str] = Header(None),
+    user_id: str = Depends(get_current_user),
+    conn: AsyncConnection = Depends(get_read_db)
+):
+    """Per-day event counts and busy minutes for start <= date < end.
+
+    Days without events are left out. Month and year overviews get a few
+    bytes per day instead of every event row.
+    """
+    if end <= start:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="end must be after start"
+        )
+    if (end - start).days > SUMMARY_MAX_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Summary window may span at most {SUMMARY_MAX_DAYS} days"
+        )
+
+    try:
+        not_modified, _ = await _check_not_modified(conn, response, user_id, f"summary:{start}:{end}", if_none_match)
+        if not_modified:
+            return not_modified
+
+        async with conn.cursor() as cursor:
+            # An end before the start runs past midnight, as in event_interval
+            await cursor.execute(
+                """SELECT event_date, count(*) AS count,
+                          sum((EXTRACT(EPOCH FROM end_time - start_time)::int / 60 + 1440) % 1440) AS busy_minutes
+                   FROM calendar_events WHERE user_id = %s
+                   AND event_date >= %s AND event_date < %s AND recurrence IS NULL
+                   GROUP BY event_date""",
+                (user_id, start, end)
+            )
+            days = {row["event_date"]: [row["count"], row["busy_minutes"]] for row in await cursor.fetchall()}
+
+        # Series are expanded here rather than stored per day, so editing one never rewrites a rollup
+        for row in await _fetch_series(conn, user_id, start, end):
+            event_start, event_end = event_interval(row["event_date"], row["start_time"], row["end_time"])
+            minutes = int((event_end - event_start).total_seconds() // 60)
+            for day in occurrences(RecurrenceRule(**row["recurrence"]), row["event_date"], start, end):
+                totals = days.setdefault(day, [0, 0])
+                totals[0] += 1
+                totals[1] += minutes
+
+        result = [
+            {"event_date": day, "count": count, "busy_minutes": busy_minutes}
+            for day, (count, busy_minutes) in sorted(days.items())
+        ]
+        return FastJSONResponse(result, headers=_carried_headers(response))
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error fetching event summary: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/freebusy", response_model=FreeBusyResponse)
+async def get_free_busy(body: FreeBusyRequest, user_id: str = Depends(get_current_user), conn: AsyncConnection = Depends(get_db)):
+    """Return busy blocks in a window and whether each candidate slot is free.
+
+    Times are naive local datetimes, matching how events are stored. All
+    slots are answered from one fetch of the window that covers them.
+    """
+    start = min([body.start] + [slot.start for slot in body.slots])
+    end = max([body.end] + [slot.end for slot in body.slots])
+    if body.end <= body.start or any(slot.end <= slot.start for slot in body.slots):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Each interval must end after it starts"
+        )
+    if end - start > timedelta(days=FREEBUSY_MAX_DAYS):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Free/busy window may span at most {FREEBUSY_MAX_DAYS} days"
+        )
+
+    try:
+        index = await load_busy(conn, [user_id], start, end)
+        return FreeBusyResponse(
+            busy=[TimeSlot(start=s, end=e) for s, e in index.busy_between(body.start, body.end)],
+            slots=[
+                SlotAvailability(
+                    start=slot.start,
+                    end=slot.end,
+                    free=index.is_free(slot.start, slot.end),
+                    conflicts=index.overlapping(slot.start, slot.end)
+                )
+                for slot in body.slots
+            ]
+        )
+    except Exception as e:
+        print(f"Error computing free/busy: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/bulk", response_model=List[EventBulkResult])
+async def bulk_create_events(body: EventBulkCreate, user_id: str = Depends(get_current_user), conn: AsyncConnection = Depends(get_db)):
+    """Create many events in one transaction."""
+    try:
+        async with conn.cursor() as cursor:
+            # executemany pipelines the inserts: one network round trip for the batch
+            await cursor.executemany(
+                f"""INSERT INTO calendar_events (user_id, title, description, event_date, start_time, end_time,
+                                                 notify_before, recurrence, recurrence_end)
+                   VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                   RETURNING {EVENT_COLUMNS}""",
+                [
+                    (user_id, e.title, e.description, e.event_date,
+                     e.start_time, e.end_time, e.notify_before or 10,
+                     *_recurrence_params(e.recurrence, e.event_date))
+                    for e in body.events
+                ],
+                returning=True
+            )
+            created = []
+            while True:
+                created.append(await cursor.fetchone())
+                if not cursor.nextset():
+                    break
+        await conn.commit()
+        await replica_router.mark_write(user_id)
+
+        return [
+            EventBulkResult(id=e["id"], status=status.HTTP_201_CREATED, event=_format_event(e))
+            for e in created
+        ]
+    except Exception as e:
+        print(f"Error bulk creating events: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.patch("/bulk", response_model=List[EventBulkResult])
+async def bulk_update_events(body: EventBulkUpdate, user_id: str = Depends(get_current_user), conn: AsyncConnection = Depends(get_db)):
+    """Update many events in one statement.
+
+    Fields left as null keep their current value, as with PUT /events/{id},
+    so neither can clear a field: send an empty description to blank it, and
+    delete and recreate a series to turn it into a single event.
+    """
+    ids = [item.id for item in body.events]
+    if len(set(ids)) != len(ids):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Duplicate event ids in bulk update"
+        )
+
+    try:
+        async with conn.cursor() as cursor:
+            await cursor.execute(
+                """UPDATE calendar_events e SET
+                       title = COALESCE(v.title, e.title),
+                       description = COALESCE(v.description, e.description),
+                       event_date = COALESCE(v.event_date, e.event_date),
+                       start_time = COALESCE(v.start_time, e.start_time),
+                       end_time = COALESCE(v.end_time, e.end_time),
+                       notify_before = COALESCE(v.notify_before, e.notify_before),
+                       recurrence = COALESCE(v.recurrence, e.recurrence),
+                       updated_at = NOW()
+                   FROM unnest(%s::uuid[], %s::varchar[], %s::text[], %s::date[],
+                               %s::time[], %s::time[], %s::integer[], %s::jsonb[])
+                        AS v(id, title, description, event_date, start_time, end_time, notify_before, recurrence)
+                   WHERE e.id = v.id AND e.user_id = %s
+                   RETURNING e.id, e.user_id, e.title, e.description, e.event_date, e.start_time,
+                             e.end_time, e.notify_before, e.created_at, e.updated_at, e.recurrence""",
+                (
+                    ids,
+                    [item.title for item in body.events],
+                    [item.description for item in body.events],
+                    [item.event_date for item in body.events],
+                    [item.start_time for item in body.events],
+                    [item.end_time for item in body.events],
+                    [item.notify_before for item in body.events],
+                    [_recurrence_json(item.recurrence) for item in body.events],
+                    user_id
+                )
+            )
+            updated = {e["id"]: e for e in await cursor.fetchall()}
+
+            reshaped = {item.id for item in body.events if item.recurrence or item.event_date}
+            await _refresh_recurrence_end(cursor, [e for e in updated.values() if e["id"] in reshaped])
+        await conn.commit()
+        if updated:
+            await replica_router.mark_write(user_id)
+
+        return [
+            EventBulkResult(id=event_id, status=status.HTTP_200_OK, event=_format_event(updated[event_id]))
+            if event_id in updated else
+            EventBulkResult(id=event_id, status=status.HTTP_404_NOT_FOUND, detail="Event not found")
+            for event_id in ids
+        ]
+    except Exception as e:
+        print(f"Error bulk updating events: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.delete("/bulk", response_model=List[EventBulkResult])
+async def bulk_delete_events(body: EventBulkDelete, user_id: str = Depends(get_current_user), conn: AsyncConnection = Depends(get_db)):
+    """Delete many events in one statement."""
+    try:
+        async with conn.cursor() as cursor:
+            await cursor.execute(
+                "DELETE FROM calendar_events WHERE user_id = %s AND id = ANY(%s) RETURNING id",
+                (user_id, body.ids)
+            )
+            rows = await cursor.fetchall()
+        await conn.commit()
+        if rows:
+            await replica_router.mark_write(user_id)
+        deleted = {e["id"] for e in rows}
+
+        return [
+            EventBulkResult(id=event_id, status=status.HTTP_204_NO_CONTENT)
+            if event_id in deleted else
+            EventBulkResult(id=event_id, status=status.HTTP_404_NOT_FOUND, detail="Event not found")
+            for event_id in body.ids
+        ]
+    except Exception as e:
+        print(f"Error bulk deleting events: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/{event_id}", response_model=EventResponse)
-async def get_event(event_id: str, user_id: str = Depends(get_current_user)):
+async def get_event(event_id: str, response: Response, user_id: str = Depends(get_current_user), conn: AsyncConnection = Depends(get_read_db)):
     """Get a specific event."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute(
-            """SELECT id, user_id, title, description, event_date, start_time, end_time,
-               notify_before, created_at, updated_at 
-               FROM calendar_events WHERE id = %s AND user_id = %s""",
-            (event_id, user_id)
-        )
-        event = cursor.fetchone()
-        cursor.close()
-        conn.close()
-        
+        async with conn.cursor() as cursor:
+            await cursor.execute(
+                f"""SELECT {EVENT_COLUMNS}
+                   FROM calendar_events WHERE id = %s AND user_id = %s""",
+                (event_id, user_id)
+            )
+            event = await cursor.fetchone()
+
         if not event:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Event not found"
             )
-        
+
+        response.headers["ETag"] = _event_etag(event)
         return _format_event(event)
     except HTTPException:
         raise
@@ -154,52 +661,88 @@ async def get_event(event_id: str, user_id: str = Depends(get_current_user)):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("", response_model=EventResponse, status_code=status.HTTP_201_CREATED)
-async def create_event(event: EventCreate, user_id: str = Depends(get_current_user)):
-    """Create a new event."""
+async def create_event(
+    event: EventCreate,
+    response: Response,
+    check_conflicts: bool = False,
+    user_id: str = Depends(get_current_user),
+    conn: AsyncConnection = Depends(get_db)
+):
+    """Create a new event.
+
+    With check_conflicts=true, an event overlapping an existing one is refused with 409.
+    """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute(
-            """INSERT INTO calendar_events (user_id, title, description, event_date, start_time, end_time, notify_before)
-               VALUES (%s, %s, %s, %s, %s, %s, %s)
-               RETURNING id, user_id, title, description, event_date, start_time, end_time, notify_before, created_at, updated_at""",
-            (user_id, event.title, event.description, event.event_date, 
-             event.start_time, event.end_time, event.notify_before or 10)
-        )
-        new_event = cursor.fetchone()
-        conn.commit()
-        cursor.close()
-        conn.close()
-        
+        if check_conflicts:
+            await _ensure_no_conflicts(
+                conn, user_id, event.event_date, event.start_time, event.end_time, event.recurrence
+            )
+
+        async with conn.cursor() as cursor:
+            await cursor.execute(
+                f"""INSERT INTO calendar_events (user_id, title, description, event_date, start_time, end_time,
+                                                 notify_before, recurrence, recurrence_end)
+                   VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                   RETURNING {EVENT_COLUMNS}""",
+                (user_id, event.title, event.description, event.event_date,
+                 event.start_time, event.end_time, event.notify_before or 10,
+                 *_recurrence_params(event.recurrence, event.event_date))
+            )
+            new_event = await cursor.fetchone()
+        await conn.commit()
+        await replica_router.mark_write(user_id)
+
+        response.headers["ETag"] = _event_etag(new_event)
         return _format_event(new_event)
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error creating event: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.put("/{event_id}", response_model=EventResponse)
-async def update_event(event_id: str, event: EventUpdate, user_id: str = Depends(get_current_user)):
-    """Update an existing event."""
+async def update_event(
+    event_id: str,
+    event: EventUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    check_conflicts: bool = False,
+    user_id: str = Depends(get_current_user),
+    conn: AsyncConnection = Depends(get_db)
+):
+    """Update an existing event.
+
+    Send the event's ETag in If-Match to fail with 412 instead of overwriting
+    a change made elsewhere since it was read. With check_conflicts=true, a
+    change that makes the event overlap another one is refused with 409.
+    """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Check if event exists and belongs to user
-        cursor.execute("SELECT id FROM calendar_events WHERE id = %s AND user_id = %s", (event_id, user_id))
-        existing = cursor.fetchone()
-        
-        if not existing:
-            cursor.close()
-            conn.close()
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Event not found"
-            )
-        
+        if check_conflicts and (event.event_date or event.start_time or event.end_time or event.recurrence):
+            # The final span may mix stored and new fields, so read the stored ones first
+            async with conn.cursor() as cursor:
+                await cursor.execute(
+                    """SELECT event_date, start_time, end_time, recurrence
+                       FROM calendar_events WHERE id = %s AND user_id = %s""",
+                    (event_id, user_id)
+                )
+                current = await cursor.fetchone()
+            if current:
+                recurrence = event.recurrence
+                if recurrence is None and current["recurrence"]:
+                    recurrence = RecurrenceRule(**current["recurrence"])
+                await _ensure_no_conflicts(
+                    conn, user_id,
+                    event.event_date or current["event_date"],
+                    event.start_time or current["start_time"],
+                    event.end_time or current["end_time"],
+                    recurrence,
+                    exclude_id=event_id
+                )
+
         # Build update query dynamically
         update_fields = []
         values = []
-        
+
         if event.title is not None:
             update_fields.append("title = %s")
             values.append(event.title)
@@ -218,29 +761,58 @@ async def update_event(event_id: str, event: EventUpdate, user_id: str = Depends
         if event.notify_before is not None:
             update_fields.append("notify_before = %s")
             values.append(event.notify_before)
-        
-        if update_fields:
-            update_fields.append("updated_at = NOW()")
-            values.extend([event_id, user_id])
-            
-            query = f"""UPDATE calendar_events SET {', '.join(update_fields)}
-                        WHERE id = %s AND user_id = %s
-                        RETURNING id, user_id, title, description, event_date, start_time, end_time, notify_before, created_at, updated_at"""
-            
-            cursor.execute(query, values)
-            updated_event = cursor.fetchone()
-            conn.commit()
-        else:
-            cursor.execute(
-                """SELECT id, user_id, title, description, event_date, start_time, end_time,
-                   notify_before, created_at, updated_at FROM calendar_events WHERE id = %s AND user_id = %s""",
-                (event_id, user_id)
-            )
-            updated_event = cursor.fetchone()
-        
-        cursor.close()
-        conn.close()
-        
+        if event.recurrence is not None:
+            update_fields.append("recurrence = %s")
+            values.append(_recurrence_json(event.recurrence))
+
+        where = "id = %s AND user_id = %s"
+        where_values = [event_id, user_id]
+        expected_version = _parse_if_match(if_match)
+        if expected_version is not None:
+            where += " AND updated_at = %s"
+            where_values.append(expected_version)
+
+        async with conn.cursor() as cursor:
+            if update_fields:
+                update_fields.append("updated_at = NOW()")
+                await cursor.execute(
+                    f"""UPDATE calendar_events SET {', '.join(update_fields)}
+                        WHERE {where}
+                        RETURNING {EVENT_COLUMNS}""",
+                    values + where_values
+                )
+            else:
+                await cursor.execute(
+                    f"SELECT {EVENT_COLUMNS} FROM calendar_events WHERE {where}",
+                    where_values
+                )
+            updated_event = await cursor.fetchone()
+
+            if updated_event and (event.recurrence or event.event_date):
+                await _refresh_recurrence_end(cursor, [updated_event])
+
+            if not updated_event:
+                # Only on failure: tell a missing event apart from a stale version
+                exists = False
+                if expected_version is not None:
+                    await cursor.execute(
+                        "SELECT 1 FROM calendar_events WHERE id = %s AND user_id = %s",
+                        (event_id, user_id)
+                    )
+                    exists = await cursor.fetchone() is not None
+                if exists:
+                    raise HTTPException(
+                        status_code=status.HTTP_412_PRECONDITION_FAILED,
+                        detail="Event was modified by another request"
+                    )
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Event not found"
+                )
+        await conn.commit()
+        await replica_router.mark_write(user_id)
+
+        response.headers["ETag"] = _event_etag(updated_event)
         return _format_event(updated_event)
     except HTTPException:
         raise
@@ -249,27 +821,25 @@ async def update_event(event_id: str, event: EventUpdate, user_id: str = Depends
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.delete("/{event_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_event(event_id: str, user_id: str = Depends(get_current_user)):
+async def delete_event(event_id: str, user_id: str = Depends(get_current_user), conn: AsyncConnection = Depends(get_db)):
     """Delete an event."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute(
-            "DELETE FROM calendar_events WHERE id = %s AND user_id = %s RETURNING id",
-            (event_id, user_id)
-        )
-        deleted = cursor.fetchone()
-        conn.commit()
-        cursor.close()
-        conn.close()
-        
+        async with conn.cursor() as cursor:
+            await cursor.execute(
+                "DELETE FROM calendar_events WHERE id = %s AND user_id = %s RETURNING id",
+                (event_id, user_id)
+            )
+            deleted = await cursor.fetchone()
+        await conn.commit()
+        if deleted:
+            await replica_router.mark_write(user_id)
+
         if not deleted:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Event not found"
             )
-        
+
         return None
     except HTTPException:
         raise
@@ -277,6 +847,331 @@ async def delete_event(event_id: str, user_id: str = Depends(get_current_user)):
         print(f"Error deleting event: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+async def _fetch_page(
+    conn: AsyncConnection,
+    response: Response,
+    user_id: str,
+    start: Optional[date],
+    end: Optional[date],
+    limit: int,
+    cursor: Optional[str]
+) -> List[dict]:
+    """Fetch one keyset page ordered by (event_date, start_time, id).
+
+    Single events are paged in SQL and merged with the series' occurrences
+    from the cursor's date on, as in _fetch_window; an occurrence's key uses
+    its own date. One extra row is read to detect whether another page
+    exists; if so its cursor is set in the X-Next-Cursor response header.
+    """
+    where = "user_id = %s AND recurrence IS NULL"
+    params: list = [user_id]
+    if start is not None:
+        where += " AND event_date >= %s"
+        params.append(start)
+    if end is not None:
+        where += " AND event_date < %s"
+        params.append(end)
+    after = None
+    if cursor:
+        after = _decode_cursor(cursor)
+        where += " AND (event_date, start_time, id) > (%s, %s, %s)"
+        params.extend(after)
+    params.append(limit + 1)
+
+    async with conn.cursor() as cur:
+        await cur.execute(
+            f"""SELECT {EVENT_COLUMNS}
+                FROM calendar_events WHERE {where}
+                ORDER BY event_date, start_time, id LIMIT %s""",
+            params
+        )
+        singles = await cur.fetchall()
+
+    first = start or date.min
+    if after is not None:
+        first = max(first, after[0])
+    series = await _fetch_series(conn, user_id, first, end)
+
+    # Open-ended series are endless generators; merge lazily and stop after limit + 1
+    merged = heapq.merge(singles, *(_series_occurrences(row, first, end) for row in series), key=_page_order)
+    if after is not None:
+        after_key = (after[0], after[1], UUID(after[2]))
+        merged = (e for e in merged if _page_order(e) > after_key)
+    events = list(islice(merged, limit + 1))
+
+    if len(events) > limit:
+        events = events[:limit]
+        response.headers["X-Next-Cursor"] = _encode_cursor(events[-1])
+    return events
+
+async def _stream_changes(user_id: str) -> AsyncIterator[str]:
+    """Relay hub messages for one client until it disconnects."""
+    queue = change_hub.subscribe(user_id)
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            try:
+                change = await asyncio.wait_for(queue.get(), timeout=STREAM_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            yield f"event: {change['op']}\ndata: {json.dumps(change)}\n\n"
+    finally:
+        change_hub.unsubscribe(user_id, queue)
+
+async def _export_batches(user_id: str) -> AsyncIterator[List[str]]:
+    """Yield batches of serialized events from a server-side cursor.
+
+    Each export opens its own connection instead of borrowing a pooled one,
+    because a slow client keeps it (and its transaction) for the whole
+    download. At most EXPORT_MAX_CONCURRENT run at once, and the server ends
+    one whose client stops reading for EXPORT_IDLE_TIMEOUT_SECONDS.
+    """
+    async with _export_slots:
+        conn = await AsyncConnection.connect(get_conninfo(), **connection_kwargs())
+        async with conn:
+            await conn.execute(
+                f"SET idle_in_transaction_session_timeout = {int(EXPORT_IDLE_TIMEOUT_SECONDS * 1000)}"
+            )
+            async with conn.cursor(name="events_export") as cur:
+                await cur.execute(
+                    f"""SELECT {EVENT_COLUMNS}
+                        FROM calendar_events WHERE user_id = %s
+                        ORDER BY event_date, start_time, id""",
+                    (user_id,)
+                )
+                while True:
+                    rows = await cur.fetchmany(EXPORT_FETCH_SIZE)
+                    if not rows:
+                        break
+                    yield [dumps(event_record(e)).decode("utf-8") for e in rows]
+
+async def _export_ndjson(user_id: str) -> AsyncIterator[str]:
+    """Stream events as newline-delimited JSON."""
+    try:
+        async for batch in _export_batches(user_id):
+            yield "".join(line + "\n" for line in batch)
+    except Exception as e:
+        print(f"Error exporting events: {e}")
+        raise
+
+async def _export_json(user_id: str) -> AsyncIterator[str]:
+    """Stream events as a single JSON array."""
+    try:
+        yield "["
+        first = True
+        async for batch in _export_batches(user_id):
+            chunk = ",".join(batch)
+            yield chunk if first else "," + chunk
+            first = False
+        yield "]"
+    except Exception as e:
+        print(f"Error exporting events: {e}")
+        raise
+
+async def _check_not_modified(
+    conn: AsyncConnection,
+    response: Response,
+    user_id: str,
+    view: str,
+    if_none_match: Optional[str]
+) -> Tuple[Optional[Response], int]:
+    """Set a list ETag and return a 304 response if the client already has it.
+
+    The ETag combines the user's change version, bumped by a trigger on every
+    write to calendar_events, with the view being requested, so the check is
+    one primary-key lookup and no event rows are read. The version is
+    returned too, for keying cached bodies.
+    """
+    async with conn.cursor() as cur:
+        await cur.execute(
+            "SELECT version FROM calendar_event_versions WHERE user_id = %s",
+            (user_id,)
+        )
+        row = await cur.fetchone()
+    version = row["version"] if row else 0
+    digest = hashlib.blake2b(view.encode("utf-8"), digest_size=8).hexdigest()
+    # no-cache makes browsers revalidate with If-None-Match on every fetch
+    headers = {"ETag": f'"{version}-{digest}"', "Cache-Control": "private, no-cache"}
+
+    if if_none_match is not None:
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if headers["ETag"] in candidates or "*" in candidates:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers), version
+    response.headers.update(headers)
+    return None, version
+
+async def _fetch_window(conn: AsyncConnection, user_id: str, start: date, end: date) -> List[dict]:
+    """Single events and expanded series occurrences with start <= date < end, in display order."""
+    async with conn.cursor() as cursor:
+        await cursor.execute(WINDOW_QUERY, (user_id, start, end))
+        events = await cursor.fetchall()
+
+    for row in await _fetch_series(conn, user_id, start, end):
+        events.extend(_series_occurrences(row, start, end))
+    events.sort(key=_display_order)
+    return events
+
+async def _fetch_series(conn: AsyncConnection, user_id: str, start: date, end: Optional[date]) -> List[dict]:
+    """Fetch the recurring series that can have occurrences in [start, end)."""
+    async with conn.cursor() as cursor:
+        if end is None:
+            await cursor.execute(SERIES_QUERY, (user_id, start))
+        else:
+            await cursor.execute(SERIES_WINDOW_QUERY, (user_id, start, end))
+        return await cursor.fetchall()
+
+def _series_occurrences(row: dict, start: date, end: Optional[date]) -> Iterator[dict]:
+    """Lazily yield a series row once per occurrence date in [start, end)."""
+    rule = RecurrenceRule(**row["recurrence"])
+    for day in occurrences(rule, row["event_date"], start, end):
+        yield {**row, "event_date": day}
+
+async def _ensure_no_conflicts(
+    conn: AsyncConnection,
+    user_id: str,
+    event_date: date,
+    start_time: time,
+    end_time: time,
+    recurrence: Optional[RecurrenceRule],
+    exclude_id: Optional[str] = None
+) -> None:
+    """Raise 409 listing the events that overlap the given span or any of its occurrences.
+
+    A series is checked from its start (or today, if later) for
+    FREEBUSY_MAX_DAYS; all spans are answered from one load_busy window. The
+    check holds a per-user advisory lock until the caller's transaction ends,
+    so two checked writes cannot both pass and then overlap each other.
+    """
+    await conn.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (user_id,))
+
+    if recurrence is None:
+        days = [event_date]
+    else:
+        first = max(event_date, date.today())
+        days = list(occurrences(recurrence, event_date, first, first + timedelta(days=FREEBUSY_MAX_DAYS)))
+    if not days:
+        return
+    spans = [event_interval(day, start_time, end_time) for day in days]
+    index = await load_busy(conn, [user_id], spans[0][0], spans[-1][1], exclude_id)
+
+    conflicts = []
+    for start, end in spans:
+        conflicts.extend(c for c in index.overlapping(start, end) if c not in conflicts)
+    if conflicts:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"message": "Event overlaps existing events", "conflicts": [str(c) for c in conflicts]}
+        )
+
+def _display_order(event: dict) -> Tuple[date, time]:
+    return event["event_date"], event["start_time"]
+
+def _page_order(event: dict) -> Tuple[date, time, UUID]:
+    # UUIDs compare like Postgres' uuid type, byte by byte
+    return event["event_date"], event["start_time"], event["id"]
+
+def _recurrence_json(recurrence: Optional[RecurrenceRule]) -> Optional[Jsonb]:
+    return Jsonb(recurrence.model_dump(mode="json")) if recurrence is not None else None
+
+def _recurrence_params(recurrence: Optional[RecurrenceRule], event_date: date) -> Tuple[Optional[Jsonb], Optional[date]]:
+    """Return the recurrence and recurrence_end column values for an insert."""
+    if recurrence is None:
+        return None, None
+    return _recurrence_json(recurrence), last_occurrence(recurrence, event_date)
+
+async def _refresh_recurrence_end(cursor, events: List[dict]) -> None:
+    """Recompute recurrence_end for series whose date or rule was just changed.
+
+    The bound depends on the final start date and rule, which are only known
+    after an update that may have changed just one of them.
+    """
+    series = [e for e in events if e["recurrence"]]
+    if series:
+        await cursor.executemany(
+            "UPDATE calendar_events SET recurrence_end = %s WHERE id = %s",
+            [(last_occurrence(RecurrenceRule(**e["recurrence"]), e["event_date"]), e["id"]) for e in series]
+        )
+
+def _encode_cursor(event: dict) -> str:
+    """Encode an event's sort key as an opaque pagination cursor."""
+    key = [event["event_date"].isoformat(), event["start_time"].isoformat(), str(event["id"])]
+    return base64.urlsafe_b64encode(json.dumps(key).encode("utf-8")).decode("ascii")
+
+def _decode_cursor(cursor: str) -> Tuple[date, time, str]:
+    """Decode a pagination cursor back into its sort key."""
+    try:
+        event_date, start_time, event_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return date.fromisoformat(event_date), time.fromisoformat(start_time), str(UUID(event_id))
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+def _encode_search_cursor(event: dict) -> str:
+    """Encode a search hit's (rank, id) position as an opaque cursor."""
+    key = [event["rank"], str(event["id"])]
+    return base64.urlsafe_b64encode(json.dumps(key).encode("utf-8")).decode("ascii")
+
+def _decode_search_cursor(cursor: str) -> Tuple[float, str]:
+    """Decode a search cursor back into its (rank, id) position."""
+    try:
+        rank, event_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return float(rank), str(UUID(event_id))
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+def _encode_sync_token(change_seq: int, event_id: str) -> str:
+    """Encode a position in the user's change sequence as an opaque sync token."""
+    return base64.urlsafe_b64encode(json.dumps([change_seq, event_id]).encode("utf-8")).decode("ascii")
+
+def _decode_sync_token(token: str) -> Tuple[int, str]:
+    """Decode a sync token back into its (change_seq, id) position."""
+    try:
+        change_seq, event_id = json.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+        return int(change_seq), str(UUID(event_id))
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid sync token"
+        )
+
+def _event_etag(event: dict) -> str:
+    """Build an event's ETag from its updated_at version."""
+    micros = (event["updated_at"] - _ETAG_EPOCH) // timedelta(microseconds=1)
+    return f'"{micros}"'
+
+def _parse_if_match(if_match: Optional[str]) -> Optional[datetime]:
+    """Return the updated_at version an If-Match header requires, if any."""
+    if if_match is None or if_match.strip() == "*":
+        return None
+    try:
+        micros = int(if_match.strip().removeprefix("W/").strip('"'))
+        return _ETAG_EPOCH + timedelta(microseconds=micros)
+    except (ValueError, OverflowError):
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="If-Match does not match the current event version"
+        )
+
+def _month_bounds(year: int, month: int) -> Tuple[date, date]:
+    """Return the half-open [start, end) date range covering a month."""
+    start = date(year, month, 1)
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return start, end
+
+def _event_list(response: Response, events: Iterable[dict]) -> FastJSONResponse:
+    """Encode event rows straight to JSON, skipping per-row model validation."""
+    return FastJSONResponse([event_record(e) for e in events], headers=_carried_headers(response))
+
+def _carried_headers(response: Response) -> dict:
+    """Headers set on the injected response (ETag, X-Next-Cursor) for a returned one."""
+    return {k: v for k, v in response.headers.items() if k != "content-length"}
+
 def _format_event(event: dict) -> EventResponse:
     """Format event data for response."""
     return EventResponse(
@@ -288,6 +1183,7 @@ def _format_event(event: dict) -> EventResponse:
         start_time=event["start_time"],
         end_time=event["end_time"],
         notify_before=event["notify_before"],
-        created_at=str(event["created_at"]),
-        updated_at=str(event["updated_at"])
+        created_at=event["created_at"].isoformat(),
+        updated_at=event["updated_at"].isoformat(),
+        recurrence=event.get("recurrence")
     )
@@ -0,0 +1,27 @@
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, status
+from auth import decode_token
+from reminders import websocket_sink
+
+router = APIRouter(prefix="/reminders", tags=["Reminders"])
+
+@router.websocket("/ws")
+async def reminders_socket(websocket: WebSocket, token: str):
+    """Receive the current user's reminders as they fire.
+
+    Browsers cannot set headers on WebSocket requests, so the JWT is passed
+    as the token query parameter.
+    """
+    user_id = decode_token(token)
+    if user_id is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    websocket_sink.connect(user_id, websocket)
+    try:
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        websocket_sink.disconnect(user_id, websocket)
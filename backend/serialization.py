@@ -0,0 +1,54 @@
+import json
+from datetime import date, datetime, time
+from typing import Any, Optional
+from uuid import UUID
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Fields of EventResponse, in response order
+EVENT_FIELDS = (
+    "id", "user_id", "title", "description", "event_date", "start_time", "end_time",
+    "notify_before", "created_at", "updated_at", "recurrence"
+)
+
+def event_record(row: dict) -> dict:
+    """Pick an event row's EventResponse fields without building a model.
+
+    Values keep their database types (UUID, date, time, datetime); dumps
+    renders them the same way EventResponse does.
+    """
+    return {field: row.get(field) for field in EVENT_FIELDS}
+
+def _default(value: Any) -> str:
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(content: Any) -> bytes:
+    """Encode JSON with orjson when installed, otherwise the stdlib encoder."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+class FastJSONResponse(JSONResponse):
+    """JSON response that skips FastAPI's response_model validation.
+
+    Routes return it with rows from event_record; the response_model on the
+    route still documents the shape in OpenAPI.
+    """
+
+    def __init__(self, content: Any = None, raw: Optional[bytes] = None, **kwargs):
+        # raw lets a cached, already encoded body be sent as is
+        self._raw = raw
+        super().__init__(content, **kwargs)
+
+    def render(self, content: Any) -> bytes:
+        if self._raw is not None:
+            return self._raw
+        return dumps(content)
@@ -0,0 +1,64 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from psycopg import AsyncConnection
+from database import get_pool
+from config import SYNC_TOMBSTONE_RETENTION_DAYS, SYNC_COMPACT_INTERVAL_SECONDS
+
+async def compact_tombstones(conn: AsyncConnection, before: datetime) -> int:
+    """Purge tombstones deleted before `before` and raise each user's compaction mark.
+
+    A sync token at or above compacted_seq still sees every delete after it;
+    older tokens get 410 Gone and must start a full sync.
+    """
+    async with conn.cursor() as cursor:
+        await cursor.execute(
+            """WITH removed AS (
+                   DELETE FROM calendar_event_tombstones WHERE deleted_at < %s
+                   RETURNING user_id, change_seq
+               ), marks AS (
+                   UPDATE calendar_event_versions v
+                   SET compacted_seq = GREATEST(v.compacted_seq, r.max_seq)
+                   FROM (SELECT user_id, MAX(change_seq) AS max_seq FROM removed GROUP BY user_id) r
+                   WHERE v.user_id = r.user_id
+               )
+               SELECT COUNT(*) AS count FROM removed""",
+            (before,)
+        )
+        count = (await cursor.fetchone())["count"]
+    await conn.commit()
+    return count
+
+class TombstoneCompactor:
+    """Periodically purges tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS."""
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                before = datetime.now(timezone.utc) - timedelta(days=SYNC_TOMBSTONE_RETENTION_DAYS)
+                async with get_pool().connection() as conn:
+                    removed = await compact_tombstones(conn, before)
+                if removed:
+                    print(f"Compacted {removed} event tombstones")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Tombstone compaction error: {e}")
+            await asyncio.sleep(SYNC_COMPACT_INTERVAL_SECONDS)
+
+tombstone_compactor = TombstoneCompactor()
@@ -0,0 +1,68 @@
+"""Partitioned-table behaviour. Converts calendar_events in the configured
+database, so it only runs with TEST_PARTITIONS=true and DATABASE_* set.
+"""
+import asyncio
+import json
+import os
+import uuid
+from datetime import date, time
+import pytest
+
+pytest.importorskip("psycopg")
+pytest.importorskip("dotenv")
+
+from config import DATABASE_HOST
+from migrations import migrate
+from partitions import add_months, connect, convert, month_start
+
+pytestmark = pytest.mark.skipif(
+    not DATABASE_HOST or os.getenv("TEST_PARTITIONS", "false").lower() != "true",
+    reason="needs DATABASE_* and TEST_PARTITIONS=true"
+)
+
+async def _move_across_months() -> dict:
+    await migrate()
+    user_id = str(uuid.uuid4())
+    this_month = month_start(date.today())
+    async with await connect() as conn, await connect() as listener:
+        await convert(conn)
+        cursor = await conn.execute(
+            """INSERT INTO calendar_events (user_id, title, event_date, start_time, end_time)
+               VALUES (%s, 'moved', %s, %s, %s) RETURNING id, change_seq""",
+            (user_id, this_month, time(9), time(10))
+        )
+        created = await cursor.fetchone()
+        await listener.execute("LISTEN calendar_events")
+        try:
+            await conn.execute(
+                "UPDATE calendar_events SET event_date = %s WHERE id = %s",
+                (add_months(this_month, 1), created["id"])
+            )
+            ops = [
+                json.loads(n.payload)["op"]
+                async for n in listener.notifies(timeout=1.0)
+                if json.loads(n.payload)["user_id"] == user_id
+            ]
+            cursor = await conn.execute(
+                "SELECT change_seq, tableoid::regclass::text AS part FROM calendar_events WHERE id = %s",
+                (created["id"],)
+            )
+            moved = await cursor.fetchone()
+            cursor = await conn.execute(
+                "SELECT count(*) AS n FROM calendar_event_tombstones WHERE id = %s", (created["id"],)
+            )
+            tombstones = (await cursor.fetchone())["n"]
+        finally:
+            await conn.execute("DELETE FROM calendar_events WHERE user_id = %s", (user_id,))
+            await conn.execute("DELETE FROM calendar_event_tombstones WHERE user_id = %s", (user_id,))
+            await conn.execute("DELETE FROM calendar_event_versions WHERE user_id = %s", (user_id,))
+    return {"created": created, "moved": moved, "tombstones": tombstones, "ops": ops}
+
+def test_cross_month_update_is_announced_as_an_update():
+    result = asyncio.run(_move_across_months())
+    assert result["moved"] is not None
+    assert result["moved"]["part"] != f"calendar_events_{month_start(date.today()):%Y_%m}"
+    assert result["moved"]["change_seq"] > result["created"]["change_seq"]
+    assert result["tombstones"] == 0
+    assert "delete" not in result["ops"]
+    assert result["ops"] == ["update"]
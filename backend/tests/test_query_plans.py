@@ -0,0 +1,66 @@
+"""EXPLAIN checks that the event read paths stay on their indexes.
+
+Runs the router's own query strings against the database in DATABASE_*
+after applying migrations. Sequential scans are disabled for the session, so
+a plan that still has one means no index can serve the query; a small table
+would otherwise be scanned anyway. The index must also be probed on the
+event_date bounds, not just on user_id with the dates filtered afterwards.
+"""
+import asyncio
+import uuid
+from datetime import date, timedelta
+from typing import Iterator, List, Set, Tuple
+import pytest
+
+pytest.importorskip("psycopg")
+pytest.importorskip("dotenv")
+pytest.importorskip("fastapi")
+
+import psycopg
+from psycopg.rows import dict_row
+from config import DATABASE_HOST
+from database import get_conninfo
+from migrations import migrate
+from routers.events import UPCOMING_LIMIT, WINDOW_QUERY, UPCOMING_QUERY, SERIES_WINDOW_QUERY
+
+pytestmark = pytest.mark.skipif(not DATABASE_HOST, reason="needs DATABASE_*")
+
+USER_ID = str(uuid.uuid4())
+MONTH_START = date.today().replace(day=1)
+MONTH_END = (MONTH_START + timedelta(days=32)).replace(day=1)
+
+def _nodes(plan: dict) -> Iterator[dict]:
+    yield plan
+    for child in plan.get("Plans", ()):
+        yield from _nodes(child)
+
+async def _explain(sql: str, params: list, index: str) -> Tuple[List[dict], Set[str]]:
+    await migrate()
+    async with await psycopg.AsyncConnection.connect(get_conninfo(), row_factory=dict_row) as conn:
+        async with conn.transaction(force_rollback=True):
+            await conn.execute("SET LOCAL enable_seqscan = off")
+            cursor = await conn.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = (await cursor.fetchone())["QUERY PLAN"][0]["Plan"]
+            # On a partitioned table each partition scans its own copy of the index
+            cursor = await conn.execute(
+                "SELECT relid::regclass::text AS name FROM pg_partition_tree(%s)", (index,)
+            )
+            names = {row["name"] for row in await cursor.fetchall()}
+    return list(_nodes(plan)), names
+
+def _assert_uses(sql: str, params: list, index: str) -> None:
+    nodes, names = asyncio.run(_explain(sql, params, index))
+    assert names, f"{index} does not exist"
+    assert not [n for n in nodes if n["Node Type"] == "Seq Scan"], nodes
+    probes = [n for n in nodes if n.get("Index Name") in names]
+    assert probes, nodes
+    assert all("event_date" in n.get("Index Cond", "") for n in probes), probes
+
+def test_month_window_uses_date_index():
+    _assert_uses(WINDOW_QUERY, [USER_ID, MONTH_START, MONTH_END], "idx_calendar_events_user_date_start")
+
+def test_upcoming_uses_date_index():
+    _assert_uses(UPCOMING_QUERY, [USER_ID, date.today(), UPCOMING_LIMIT], "idx_calendar_events_user_date_start")
+
+def test_series_window_uses_series_index():
+    _assert_uses(SERIES_WINDOW_QUERY, [USER_ID, MONTH_START, MONTH_END], "idx_calendar_events_user_series")
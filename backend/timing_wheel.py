@@ -0,0 +1,78 @@
+from typing import Any, List, Tuple
+
+class TimingWheel:
+    """Hierarchical timing wheel keyed by integer ticks.
+
+    Level l has `slots` buckets each spanning slots**l ticks. An entry sits in
+    the lowest level whose span covers its distance from the current tick and
+    cascades one level down each time that bucket comes round, so adding is
+    O(1) and advancing costs O(1) per tick plus the entries that expire.
+    Entries further out than the top level wait in an overflow list.
+    """
+
+    def __init__(self, start_tick: int, slots: int = 64, levels: int = 4):
+        self.slots = slots
+        self.levels = levels
+        self.current = start_tick
+        self._wheels: List[List[List[Tuple[int, Any]]]] = [
+            [[] for _ in range(slots)] for _ in range(levels)
+        ]
+        self._overflow: List[Tuple[int, Any]] = []
+        self._ready: List[Any] = []
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, tick: int, item: Any) -> None:
+        """Schedule item to expire at tick; past ticks expire on the next advance."""
+        self._size += 1
+        self._place(tick, item)
+
+    def advance(self, now: int) -> List[Any]:
+        """Move the wheel to tick now and return every item that expired."""
+        expired, self._ready = self._ready, []
+        while self.current < now:
+            self.current += 1
+            self._cascade()
+            # Cascaded entries due exactly now land in the ready list
+            if self._ready:
+                expired.extend(self._ready)
+                self._ready = []
+            bucket = self._wheels[0][self.current % self.slots]
+            if bucket:
+                expired.extend(item for _, item in bucket)
+                bucket.clear()
+        self._size -= len(expired)
+        return expired
+
+    def _place(self, tick: int, item: Any) -> None:
+        delta = tick - self.current
+        if delta <= 0:
+            self._ready.append(item)
+            return
+        span = self.slots
+        for level in range(self.levels):
+            if delta < span:
+                index = (tick // (span // self.slots)) % self.slots
+                self._wheels[level][index].append((tick, item))
+                return
+            span *= self.slots
+        self._overflow.append((tick, item))
+
+    def _cascade(self) -> None:
+        """Redistribute higher-level buckets whose time has come."""
+        span = 1
+        for level in range(1, self.levels):
+            span *= self.slots
+            if self.current % span:
+                return
+            index = (self.current // span) % self.slots
+            bucket, self._wheels[level][index] = self._wheels[level][index], []
+            for tick, item in bucket:
+                self._place(tick, item)
+        # Top level wrapped: bring in overflow entries that now fit
+        if self.current % (span * self.slots) == 0:
+            pending, self._overflow = self._overflow, []
+            for tick, item in pending:
+                self._place(tick, item)
@@ -1,12 +1,32 @@
-import { useState, useEffect, useCallback } from 'react';
+import { useState, useEffect, useCallback, useRef } from 'react';
 import { eventsAPI } from '../utils/api';
 
+// Matches UPCOMING_LIMIT on the server
+const UPCOMING_LIMIT = 20;
+
+const localToday = () => {
+    const now = new Date();
+    const pad = (n) => String(n).padStart(2, '0');
+    return `${now.getFullYear()}-${pad(now.getMonth() + 1)}-${pad(now.getDate())}`;
+};
+
+const byDateAndTime = (a, b) =>
+    a.event_date.localeCompare(b.event_date) || a.start_time.localeCompare(b.start_time);
+
+// Replace or drop an event by id and re-insert it when it still belongs in the list
+const applyChange = (list, change, belongs) => {
+    const rest = list.filter(e => e.id !== change.id);
+    if (change.op === 'delete' || !belongs(change.event)) return rest;
+    return [...rest, change.event].sort(byDateAndTime);
+};
+
 export const useEvents = () => {
     const [events, setEvents] = useState([]);
     const [todayEvents, setTodayEvents] = useState([]);
     const [upcomingEvents, setUpcomingEvents] = useState([]);
     const [isLoading, setIsLoading] = useState(false);
     const [error, setError] = useState(null);
+    const streamRef = useRef(null);
 
     const fetchAllEvents = useCallback(async () => {
         setIsLoading(true);
@@ -64,29 +84,69 @@ export const useEvents = () => {
         }
     }, []);
 
+    // Apply a pushed create/update/delete; fall back to refetching when the
+    // delta cannot be applied locally (resync, recurring series, oversized row)
+    const handleChange = useCallback((change) => {
+        if (change.op === 'resync' || (change.op !== 'delete' && (!change.event || change.event.recurrence))) {
+            fetchTodayEvents();
+            fetchUpcomingEvents();
+            return;
+        }
+        const today = localToday();
+        setEvents(prev => applyChange(prev, change, () => change.op === 'create' || prev.some(e => e.id === change.id)));
+        setTodayEvents(prev => applyChange(prev, change, e => e.event_date === today));
+        setUpcomingEvents(prev => {
+            const wasListed = prev.some(e => e.id === change.id);
+            // A full list that loses an entry needs the next one from the server
+            if (wasListed && prev.length >= UPCOMING_LIMIT) {
+                fetchUpcomingEvents();
+                return prev;
+            }
+            return applyChange(prev, change, e => e.event_date >= today).slice(0, UPCOMING_LIMIT);
+        });
+    }, [fetchTodayEvents, fetchUpcomingEvents]);
+
+    useEffect(() => {
+        if (!localStorage.getItem('token')) return undefined;
+        const source = new EventSource(eventsAPI.streamUrl());
+        streamRef.current = source;
+        const onMessage = (message) => handleChange(JSON.parse(message.data));
+        ['create', 'update', 'delete', 'resync'].forEach(op => source.addEventListener(op, onMessage));
+        return () => {
+            source.close();
+            streamRef.current = null;
+        };
+    }, [handleChange]);
+
+    // Only refetch after our own writes when no stream will deliver the change
+    const refreshIfOffline = useCallback(async () => {
+        if (streamRef.current?.readyState === EventSource.OPEN) return;
+        await fetchTodayEvents();
+        await fetchUpcomingEvents();
+    }, [fetchTodayEvents, fetchUpcomingEvents]);
+
     const createEvent = useCallback(async (eventData) => {
         try {
             const newEvent = await eventsAPI.create(eventData);
-            setEvents(prev => [...prev, newEvent]);
-            await fetchTodayEvents();
-            await fetchUpcomingEvents();
+            // Upsert: the stream's create for this event may have arrived first
+            setEvents(prev => applyChange(prev, { op: 'create', id: newEvent.id, event: newEvent }, () => true));
+            await refreshIfOffline();
             return newEvent;
         } catch (err) {
             throw err;
         }
-    }, [fetchTodayEvents, fetchUpcomingEvents]);
+    }, [refreshIfOffline]);
 
     const updateEvent = useCallback(async (id, eventData) => {
         try {
             const updatedEvent = await eventsAPI.update(id, eventData);
             setEvents(prev => prev.map(e => e.id === id ? updatedEvent : e));
-            await fetchTodayEvents();
-            await fetchUpcomingEvents();
+            await refreshIfOffline();
             return updatedEvent;
         } catch (err) {
             throw err;
         }
-    }, [fetchTodayEvents, fetchUpcomingEvents]);
+    }, [refreshIfOffline]);
 
     const deleteEvent = useCallback(async (id) => {
         console.log('useEvents.deleteEvent called with id:', id);
@@ -94,13 +154,12 @@ export const useEvents = () => {
             await eventsAPI.delete(id);
             console.log('API delete successful, updating local state');
             setEvents(prev => prev.filter(e => e.id !== id));
-            await fetchTodayEvents();
-            await fetchUpcomingEvents();
+            await refreshIfOffline();
         } catch (err) {
             console.error('useEvents.deleteEvent error:', err);
             throw err;
         }
-    }, [fetchTodayEvents, fetchUpcomingEvents]);
+    }, [refreshIfOffline]);
 
     const refreshEvents = useCallback(async () => {
         await Promise.all([
@@ -35,14 +35,31 @@ export const authAPI = {
     },
 };
 
-// Events API
-export const eventsAPI = {
-    getAll: async () => {
-        const response = await fetch(`${API_URL}/events`, {
+// Follow X-Next-Cursor headers until every page of a list endpoint is loaded
+const fetchAllPages = async (url) => {
+    const events = [];
+    let cursor = null;
+    do {
+        const separator = url.includes('?') ? '&' : '?';
+        const pageUrl = cursor ? `${url}${separator}cursor=${encodeURIComponent(cursor)}` : url;
+        const response = await fetch(pageUrl, {
             headers: getAuthHeaders(),
         });
         if (!response.ok) throw new Error('Failed to fetch events');
-        return response.json();
+        events.push(...await response.json());
+        cursor = response.headers.get('X-Next-Cursor');
+    } while (cursor);
+    return events;
+};
+
+// Events API
+export const eventsAPI = {
+    getAll: async () => {
+        return fetchAllPages(`${API_URL}/events`);
+    },
+
+    getRange: async (start, end) => {
+        return fetchAllPages(`${API_URL}/events/range?start=${start}&end=${end}`);
     },
 
     getByDate: async (date) => {
@@ -61,6 +78,15 @@ export const eventsAPI = {
         return response.json();
     },
 
+    // Per-day counts and busy minutes for start <= date < end, without the events themselves
+    getSummary: async (start, end) => {
+        const response = await fetch(`${API_URL}/events/summary?start=${start}&end=${end}`, {
+            headers: getAuthHeaders(),
+        });
+        if (!response.ok) throw new Error('Failed to fetch event summary');
+        return response.json();
+    },
+
     getUpcoming: async () => {
         const response = await fetch(`${API_URL}/events/upcoming`, {
             headers: getAuthHeaders(),
@@ -77,6 +103,12 @@ export const eventsAPI = {
         return response.json();
     },
 
+    // EventSource cannot send headers, so the token goes in the query string
+    streamUrl: () => {
+        const token = localStorage.getItem('token');
+        return `${API_URL}/events/stream?token=${encodeURIComponent(token || '')}`;
+    },
+
     getById: async (id) => {
         const response = await fetch(`${API_URL}/events/${id}`, {
             headers: getAuthHeaders(),